@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the benchmarks::
+
+    python -m benchmarks [-o results.json] [-c baseline.json] [name ...]
+
+Results can be saved as JSON and compared to a previous run. The exit
+status is 1 when a benchmark is slower than the baseline by more than the
+threshold.
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_app, bench_errors, bench_http, bench_schematics  # noqa
+from benchmarks.runner import compare, load, run_all, save
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('names', nargs='*',
+                        help='only run benchmarks containing these names')
+    parser.add_argument('-o', '--output', help='save results to a JSON file')
+    parser.add_argument('-c', '--compare',
+                        help='compare results to a previous JSON file')
+    parser.add_argument('-t', '--threshold', type=float, default=1.1,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='minimum duration of a run, in seconds')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed runs')
+    args = parser.parse_args(argv)
+
+    results = run_all(args.names, args.min_time, args.repeat)
+
+    if args.output:
+        save(args.output, results)
+
+    if args.compare:
+        print()
+        if compare(load(args.compare), results, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
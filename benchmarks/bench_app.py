@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Full stack requests, from the router to the encoded response, through
+``handle_request`` (no network).
+"""
+
+import json
+
+from benchmarks.helpers import make_request, payload
+from benchmarks.runner import benchmark
+from examples.contrib_schematics import app as schematics_app
+from rafter import Rafter
+
+app = Rafter()
+items = payload(100)
+
+
+@app.resource('/items')
+async def list_items(request):
+    return items
+
+
+def _run(app, method, url, headers=None, body=b''):
+    def write(response):
+        response.output()
+
+    async def stream(response):
+        pass
+
+    async def run():
+        await app.handle_request(
+            make_request(app, method, url, headers, body), write, stream)
+
+    return run
+
+
+@benchmark('app.request[rafter]')
+def rafter_request():
+    return _run(app, 'GET', '/items')
+
+
+@benchmark('app.request[schematics GET]')
+def schematics_get():
+    return _run(schematics_app, 'GET', '/tags/abc?page=2&sort=desc')
+
+
+@benchmark('app.request[schematics POST]')
+def schematics_post():
+    return _run(schematics_app, 'POST', '/post',
+                {'content-type': 'application/json'},
+                json.dumps({'id': 3, 'name': 'abc'}).encode())
+
+
+@benchmark('app.request[schematics response]')
+def schematics_response():
+    return _run(schematics_app, 'POST', '/return',
+                {'content-type': 'application/json'},
+                json.dumps({'name': 'x', 'params': {'xray': 1}}).encode())
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from benchmarks.runner import benchmark
+from rafter.contrib.schematics.exceptions import ValidationErrors
+
+
+def error_tree(width, depth):
+    if depth == 0:
+        return ['This field is required.']
+
+    return dict(('field_{}'.format(i), error_tree(width, depth - 1))
+                for i in range(width))
+
+
+@benchmark('validation_errors.error_list',
+           [('10x2', (10, 2)), ('10x3', (10, 3)), ('10x4', (10, 4))])
+def error_list(shape):
+    errors = {'body': error_tree(*shape)}
+
+    def run():
+        return ValidationErrors(errors).error_list
+
+    return run
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from benchmarks.helpers import payload
+from benchmarks.runner import benchmark
+from rafter.http import Response
+
+sizes = [('1', 1), ('100', 100), ('10000', 10000)]
+
+
+@benchmark('response.body', sizes)
+def response_body(size):
+    data = payload(size)
+
+    def run():
+        return Response(data).body
+
+    return run
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import json
+
+from benchmarks.helpers import make_request
+from benchmarks.runner import benchmark
+from examples.contrib_schematics import (
+    InputSchema, ReturnSchema, TagSchema, app)
+from rafter.contrib.schematics.filters import (
+    filter_validate_response, filter_validate_schemas)
+from rafter.filters import filter_transform_response
+
+
+async def view(request, *args, **kwargs):
+    return {}
+
+
+@benchmark('filter_validate_schemas[body]')
+def validate_body():
+    get_response = filter_validate_schemas(view, {'request_schema':
+                                                  InputSchema})
+    body = json.dumps({'id': 3, 'name': 'abc'}).encode()
+    headers = {'content-type': 'application/json', 'x-test': '2'}
+
+    async def run():
+        await get_response(make_request(app, 'POST', '/post', headers, body))
+
+    return run
+
+
+@benchmark('filter_validate_schemas[path+params]')
+def validate_params():
+    get_response = filter_validate_schemas(view, {'request_schema':
+                                                  TagSchema})
+
+    async def run():
+        await get_response(make_request(app, 'GET', '/tags/abc?page=2'),
+                           tag='abc')
+
+    return run
+
+
+@benchmark('filter_validate_response')
+def validate_response():
+    async def resource(request):
+        return {'name': 'x', 'params': {'xray': 'true'}}
+
+    get_response = filter_validate_response(
+        filter_transform_response(resource, {}),
+        {'response_schema': ReturnSchema})
+
+    async def run():
+        await get_response(make_request(app, 'POST', '/return'))
+
+    return run
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from sanic.server import CIDict
+
+
+def make_request(app, method, url, headers=None, body=b''):
+    """
+    Returns a request object as built by the server, without any network.
+    """
+    h = CIDict()
+    for k, v in (headers or {}).items():
+        h[k] = v
+
+    request = app.request_class(url.encode(), h, '1.1', method, None)
+    request.app = app
+    request.body = body
+
+    return request
+
+
+def payload(size):
+    """
+    Returns a list of ``size`` records.
+    """
+    return [{
+        'id': i,
+        'name': 'item {}'.format(i),
+        'price': i * 1.5,
+        'active': i % 2 == 0,
+        'tags': ['a', 'b', 'c'],
+        'owner': {'id': i % 10, 'email': 'user{}@example.com'.format(i)}
+    } for i in range(size)]
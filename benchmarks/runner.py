@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+A small benchmark runner without any dependency.
+
+Benchmarks are registered with the :func:`benchmark` decorator. The
+decorated function is the setup: it receives a parameter value and returns
+the function to time (a regular function or a coroutine function).
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from inspect import iscoroutinefunction
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+_registry = []
+
+
+def benchmark(name, params=None):
+    """
+    Registers a benchmark setup function. With ``params`` (a list of
+    ``(label, value)`` tuples), a benchmark is registered for each value.
+    """
+    def decorator(setup):
+        if params is None:
+            _registry.append((name, setup, None))
+        else:
+            for label, value in params:
+                _registry.append(('{}[{}]'.format(name, label), setup,
+                                  (value,)))
+        return setup
+
+    return decorator
+
+
+def _timer(func, loop):
+    # Returns a function running `func` n times and returning the elapsed
+    # time in nanoseconds.
+    if iscoroutinefunction(func):
+        async def run_async(n):
+            start = time.perf_counter_ns()
+            for _ in range(n):
+                await func()
+            return time.perf_counter_ns() - start
+
+        return lambda n: loop.run_until_complete(run_async(n))
+
+    def run(n):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            func()
+        return time.perf_counter_ns() - start
+
+    return run
+
+
+def measure(func, min_time=0.2, repeat=5, loop=None):
+    """
+    Times ``func``. The number of loops is calibrated so that a run takes
+    at least ``min_time`` seconds, then ``repeat`` runs are timed.
+    Returns a dict of results, times are in nanoseconds per call.
+    """
+    run = _timer(func, loop)
+    run(1)  # Warm up
+
+    loops = 1
+    while True:
+        elapsed = run(loops)
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 10 if elapsed < min_time * 1e8 else 2
+
+    times = [run(loops) / loops for _ in range(repeat)]
+    return {
+        'loops': loops,
+        'repeat': repeat,
+        'min_ns': min(times),
+        'median_ns': statistics.median(times),
+        'stdev_ns': statistics.stdev(times) if repeat > 1 else 0.0,
+        'ops_per_sec': 1e9 / min(times)
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(selection=None, min_time=0.2, repeat=5, log=print):
+    """
+    Runs the registered benchmarks whose name contains one of the strings
+    of ``selection`` (all of them by default) and returns a dict ready to
+    be stored as JSON.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = {}
+    try:
+        for name, setup, args in _registry:
+            if selection and not any(s in name for s in selection):
+                continue
+
+            func = setup(*args) if args else setup()
+            results[name] = measure(func, min_time, repeat, loop)
+            log('{:<50} {:>12.1f} us {:>12.0f} ops/s'.format(
+                name, results[name]['min_ns'] / 1e3,
+                results[name]['ops_per_sec']))
+    finally:
+        loop.close()
+
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'min_time': min_time,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def compare(baseline, current, threshold=1.1, log=print):
+    """
+    Prints the ratio of each benchmark's time to its baseline time and
+    returns the names of the benchmarks slower than ``threshold`` times
+    the baseline.
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            log('{:<50} {:>12}'.format(name, 'new'))
+            continue
+
+        ratio = result['min_ns'] / base['min_ns']
+        flag = ''
+        if ratio > threshold:
+            flag = ' slower'
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = ' faster'
+        log('{:<50} {:>11.2f}x{}'.format(name, ratio, flag))
+
+    return regressions
+
+
+def load(path):
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def save(path, data):
+    with open(path, 'w') as fp:
+        json.dump(data, fp, indent=2, sort_keys=True)
+        fp.write('\n')
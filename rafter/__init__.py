@@ -6,3 +6,4 @@ from rafter.app import *         # noqa
 from rafter.blueprints import *  # noqa
 from rafter.exceptions import *  # noqa
 from rafter.http import *        # noqa
+from rafter.serializers import *  # noqa
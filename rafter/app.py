@@ -3,14 +3,23 @@
 .. autoclass:: Rafter
 """
 
-from functools import wraps
+from asyncio import get_event_loop
+from functools import update_wrapper, wraps
 import logging
 
 from sanic import Sanic
+from sanic.response import HTTPResponse
 
+from rafter.batch import BatchHandler
 from rafter.exceptions import default_error_handlers
-from rafter.filters import filter_transform_response
+from rafter.filters import (
+    Filter, build_pipeline, filter_cache, filter_compress, filter_concurrency,
+    filter_etag, filter_projection, filter_rate_limit, filter_serialize,
+    filter_single_flight, filter_transform_response)
 from rafter.http import Request
+from rafter.metrics import Metrics
+from rafter.profiling import FilterProfiler
+from rafter.serializers import JSONSerializer, SerializerRegistry
 
 log = logging.getLogger(__name__)
 
@@ -30,12 +39,28 @@ class Rafter(Sanic):
     .. autoattribute:: default_filters
     .. autoattribute:: default_error_handlers
     .. autoattribute:: default_request_class
+    .. autoattribute:: default_serializers
 
     .. automethod:: add_resource
     .. automethod:: resource
+    .. automethod:: add_batch_resource
+    .. automethod:: add_metrics_resource
+    .. automethod:: offload
+    .. automethod:: run_in_executor
+    .. automethod:: init_filters
     """
 
-    default_filters = [filter_transform_response]
+    default_filters = [
+        filter_transform_response,
+        filter_projection,
+        filter_serialize,
+        filter_concurrency,
+        filter_compress,
+        filter_single_flight,
+        filter_cache,
+        filter_etag,
+        filter_rate_limit
+    ]
     """
     Default filters called on every resource route.
     """
@@ -52,7 +77,28 @@ class Rafter(Sanic):
     :class:`rafter.http.Request`.
     """
 
+    default_serializers = (JSONSerializer(),)
+    """
+    Default response serializers. The first one is used when the request's
+    ``Accept`` header doesn't match any other serializer. They are added
+    to the app's ``serializers`` registry
+    (:class:`rafter.serializers.SerializerRegistry`).
+    """
+
     def __init__(self, **kwargs):
+        """
+        :param metrics: ``True`` or a :class:`rafter.metrics.Metrics`
+                        instance to record per route metrics (optional)
+        :param executor: A ``concurrent.futures`` executor validating and
+                         serializing large payloads (optional)
+        :param offload_size: The payload size, in bytes, from which the
+                             executor is used (default: 1 MiB)
+
+        Other arguments are passed to Sanic.
+        """
+        metrics = kwargs.pop('metrics', None)
+        executor = kwargs.pop('executor', None)
+        offload_size = kwargs.pop('offload_size', 1048576)
         kwargs.setdefault('request_class', self.default_request_class)
         if not issubclass(kwargs['request_class'], Request):
             raise RuntimeError('request_class should inherit '
@@ -63,6 +109,35 @@ class Rafter(Sanic):
         for e, f in self.default_error_handlers:
             self.error_handler.add(e, f)
 
+        self.serializers = SerializerRegistry(self.default_serializers)
+
+        if metrics is True:
+            metrics = Metrics()
+        self.executor = executor
+        self.offload_size = offload_size
+
+        self.metrics = metrics or None
+        if self.metrics is not None and self.metrics.directory is not None:
+            @self.listener('after_server_start')
+            async def start_metrics(app, loop):
+                app.metrics.start(loop)
+
+    def offload(self, size):
+        """
+        Returns ``True`` when a payload of ``size`` bytes should be
+        processed in the app's executor, that is when an executor is set
+        and ``size`` is at least ``offload_size``.
+        """
+        return self.executor is not None and size >= self.offload_size
+
+    def run_in_executor(self, func, *args):
+        """
+        Runs ``func(*args)`` in the app's executor and returns a future.
+        With a ``ProcessPoolExecutor``, the function and its arguments
+        must be picklable.
+        """
+        return get_event_loop().run_in_executor(self.executor, func, *args)
+
     def resource(self, uri, methods=frozenset({'GET'}), **kwargs):
         """
         Decorates a function to be registered as a resource route.
@@ -77,12 +152,30 @@ class Rafter(Sanic):
         :param filters: List of callable that will filter request and
                         response data
         :param validators: List of callable added to the filter list.
+        :param cache: Response cache options
+                      (see :func:`rafter.filters.filter_cache`)
+        :param etag: ``True`` or a version function
+                     (see :func:`rafter.filters.filter_etag`)
+        :param last_modified: Last modification date function
+        :param single_flight: Coalesce identical concurrent requests
+                              (see :func:`rafter.filters.filter_single_flight`)
+        :param compress: Response compression options
+                         (see :func:`rafter.filters.filter_compress`)
+        :param profile: Time each filter of the chain
+                        (see :class:`rafter.profiling.FilterProfiler`)
+        :param max_concurrency: Maximum number of concurrent requests
+                                (see :func:`rafter.filters.filter_concurrency`)
+        :param max_queue: Maximum number of waiting requests
+        :param queue_timeout: Maximum waiting time, in seconds
+        :param retry_after: ``Retry-After`` value of rejected requests
+        :param rate_limit: Request rate limit of each client
+                           (see :func:`rafter.filters.filter_rate_limit`)
+        :param fields: Let clients select the returned fields
+                       (see :func:`rafter.filters.filter_projection`)
 
         :return: A decorated function
         """
         def decorator(f):
-            if kwargs.get('stream'):
-                f.is_stream = kwargs['stream']
             self.add_resource(f, uri=uri, methods=methods, **kwargs)
 
         return decorator
@@ -97,11 +190,32 @@ class Rafter(Sanic):
         :param methods: list or tuple of methods allowed
         :param host:
         :param strict_slashes:
+        :param stream:
         :param version:
         :param name: user defined route name for url_for
         :param filters: List of callable that will filter request and
                         response data
         :param validators: List of callable added to the filter list.
+        :param cache: Response cache options
+                      (see :func:`rafter.filters.filter_cache`)
+        :param etag: ``True`` or a version function
+                     (see :func:`rafter.filters.filter_etag`)
+        :param last_modified: Last modification date function
+        :param single_flight: Coalesce identical concurrent requests
+                              (see :func:`rafter.filters.filter_single_flight`)
+        :param compress: Response compression options
+                         (see :func:`rafter.filters.filter_compress`)
+        :param profile: Time each filter of the chain
+                        (see :class:`rafter.profiling.FilterProfiler`)
+        :param max_concurrency: Maximum number of concurrent requests
+                                (see :func:`rafter.filters.filter_concurrency`)
+        :param max_queue: Maximum number of waiting requests
+        :param queue_timeout: Maximum waiting time, in seconds
+        :param retry_after: ``Retry-After`` value of rejected requests
+        :param rate_limit: Request rate limit of each client
+                           (see :func:`rafter.filters.filter_rate_limit`)
+        :param fields: Let clients select the returned fields
+                       (see :func:`rafter.filters.filter_projection`)
 
         :return: function or class instance
         """
@@ -115,6 +229,7 @@ class Rafter(Sanic):
 
         filter_list = list(filters) + list(validators)
         filter_options = {
+            'app': self,
             'filter_list': filter_list,
             'handler': handler,
             'uri': uri,
@@ -122,20 +237,121 @@ class Rafter(Sanic):
         }
         filter_options.update(kwargs)
 
-        handler = self.init_filters(filter_list, filter_options)(handler)
+        if kwargs.get('stream'):
+            handler.is_stream = kwargs['stream']
+            self.is_request_stream = True
+
+        decorator = self.init_filters(filter_list, filter_options)
+        if self.metrics is None:
+            handler = decorator(handler)
+        else:
+            name = kwargs.get('name') or getattr(handler, '__name__', uri)
+            if hasattr(handler, '__blueprintname__'):
+                name = '{}.{}'.format(handler.__blueprintname__, name)
+            handler = self.metrics.instrument(handler, decorator, name)
+
         return self.add_route(handler=handler, uri=uri, methods=methods,
                               **view_kwargs)
 
+    def add_batch_resource(self, uri='/batch', max_items=50, **kwargs):
+        """
+        Register a batch resource, running several sub-requests in one
+        ``POST`` request (see :class:`rafter.batch.BatchHandler`).
+
+        :param uri: path of the URL
+        :param max_items: The maximum number of items of a batch
+
+        Other arguments are passed to :meth:`add_resource`.
+
+        :return: function or class instance
+        """
+        handler = BatchHandler(self, max_items)
+        kwargs.setdefault('name', 'batch')
+
+        return self.add_resource(handler, uri=uri, methods=['POST'], **kwargs)
+
+    def add_metrics_resource(self, uri='/metrics', **kwargs):
+        """
+        Register a route exposing the app's metrics in the Prometheus text
+        format (see :class:`rafter.metrics.Metrics`). The app must be
+        created with the ``metrics`` argument.
+
+        :param uri: path of the URL
+
+        Other arguments are passed to Sanic's ``add_route``.
+        """
+        if self.metrics is None:
+            raise RuntimeError('Metrics are not enabled on this app')
+
+        async def metrics(request):
+            return HTTPResponse(
+                self.metrics.render(),
+                content_type='text/plain; version=0.0.4; charset=utf-8')
+
+        return self.add_route(metrics, uri=uri, methods=['GET'], **kwargs)
+
     @staticmethod
     def init_filters(filter_list, params):
+        """
+        Returns a decorator chaining the filters of ``filter_list`` around
+        a resource handler.
+
+        Function filters are chained as nested closures. Consecutive
+        :class:`rafter.filters.Filter` classes are instantiated and run
+        by a single pipeline coroutine
+        (see :func:`rafter.filters.build_pipeline`).
+
+        When the ``profile`` parameter is set, each layer of the chain is
+        timed (see :class:`rafter.profiling.FilterProfiler`).
+        """
         def decorator(handler):
+            profiler = None
+            if params.get('profile'):
+                profiler = FilterProfiler(params['profile'])
+
+            def wrap(get_response, f, name):
+                if profiler is None or get_response is f:
+                    return get_response
+                return profiler.wrap(get_response, name)
+
             get_response = handler
+            if profiler is not None:
+                get_response = profiler.wrap(
+                    handler, getattr(handler, '__name__', 'resource'))
+
+            pipeline = []
             for f in filter_list:
-                get_response = f(get_response, params)
+                if isinstance(f, type) and issubclass(f, Filter):
+                    pipeline.append(f(params))
+                    continue
+
+                if pipeline:
+                    get_response = wrap(
+                        build_pipeline(get_response, pipeline), get_response,
+                        '+'.join(type(p).__name__ for p in pipeline))
+                    pipeline = []
+                get_response = wrap(f(get_response, params), get_response,
+                                    f.__name__)
+
+            if pipeline:
+                get_response = wrap(
+                    build_pipeline(get_response, pipeline), get_response,
+                    '+'.join(type(p).__name__ for p in pipeline))
+
+            if profiler is not None:
+                return profiler.finish(get_response, handler)
+
+            if get_response is handler:
+                return handler
 
-            @wraps(handler)
-            async def wrapper(request, *args, **kwargs):
-                return await get_response(request, *args, **kwargs)
+            # No extra coroutine: the outermost filter takes the handler's
+            # attributes (name, blueprint, stream flag...)
+            try:
+                return update_wrapper(get_response, handler)
+            except AttributeError:
+                @wraps(handler)
+                async def wrapper(request, *args, **kwargs):
+                    return await get_response(request, *args, **kwargs)
 
-            return wrapper
+                return wrapper
         return decorator
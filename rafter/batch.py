@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: BatchHandler
+
+    .. automethod:: __call__
+"""
+
+import asyncio
+from inspect import isawaitable, unwrap
+import json
+from urllib.parse import urlencode
+
+from sanic.response import StreamingHTTPResponse, json_dumps
+
+from rafter.exceptions import ApiError
+from rafter.http import Response
+
+__all__ = ('BatchHandler',)
+
+
+class BatchHandler(object):
+    """
+    A resource running several sub-requests in a single HTTP call.
+    It is registered with :meth:`rafter.app.Rafter.add_batch_resource`.
+
+    The request body is a list of items with the following keys:
+
+    - ``path``: The path of the resource (required)
+    - ``method``: The request method (default: ``GET``)
+    - ``params``: A dict of query string parameters. Values can be lists.
+    - ``headers``: A dict of extra request headers
+    - ``body``: A JSON body
+
+    Each item goes through the app's router and its resource's filters,
+    like a regular request. All items run concurrently and the response
+    is a list of ``{"status": ..., "headers": ..., "body": ...}`` objects,
+    in the same order. A failing item has the status and body of its error.
+
+    Sub-requests get the headers of the batch request and of their item,
+    except the body, conditional and ``Accept-Encoding`` headers. Request
+    and response middlewares are not called. Streaming resources are not
+    supported, nor are batch resources, whatever their path. Sub-requests
+    have a ``batch_parent`` attribute holding the batch request.
+
+    :param app: The :class:`rafter.app.Rafter` instance
+    :param max_items: The maximum number of items of a batch
+    """
+
+    ignored_headers = frozenset((
+        'content-length', 'content-type', 'content-encoding',
+        'transfer-encoding', 'accept-encoding', 'if-none-match',
+        'if-modified-since'))
+
+    def __init__(self, app, max_items=50):
+        self.app = app
+        self.max_items = max_items
+
+    async def __call__(self, request):
+        """
+        Runs the items of the request's body and returns a
+        :class:`rafter.http.Response` with their results.
+        """
+        if getattr(request, 'batch_parent', None) is not None:
+            raise ApiError('Batch items cannot be batches', 400)
+
+        items = request.json
+        if not isinstance(items, list):
+            raise ApiError('Batch body must be a list', 400)
+        if len(items) > self.max_items:
+            raise ApiError('Too many batch items', 400,
+                           max_items=self.max_items)
+
+        headers = [(k, v) for k, v in request.headers.items()
+                   if k.lower() not in self.ignored_headers]
+
+        return Response(list(await asyncio.gather(
+            *(self._run_item(request, headers, item) for item in items))))
+
+    async def _run_item(self, parent, headers, item):
+        request = parent
+        try:
+            request = self._make_request(parent, headers, item)
+            return self._result(await self._get_response(request))
+        except Exception as e:
+            response = self.app.error_handler.response(request, e)
+            if isawaitable(response):
+                response = await response
+
+        return self._result(response)
+
+    def _result(self, response):
+        return {
+            'status': response.status,
+            'headers': dict((k, v) for k, v in response.headers.items()
+                            if k.lower() != 'content-length'),
+            'body': self._body(response)
+        }
+
+    def _make_request(self, parent, headers, item):
+        if not isinstance(item, dict) or \
+                not isinstance(item.get('path'), str):
+            raise ApiError('Invalid batch item', 400)
+
+        url = path = item['path']
+        if item.get('params'):
+            url += ('&' if '?' in path else '?') + \
+                urlencode(item['params'], doseq=True)
+
+        # Set one by one, for case insensitive mappings to lower the names
+        request_headers = type(parent.headers)()
+        for k, v in headers:
+            request_headers[k] = v
+        for k, v in (item.get('headers') or {}).items():
+            if k.lower() not in self.ignored_headers:
+                request_headers[k] = v
+        headers = request_headers
+
+        body = b''
+        if item.get('body') is not None:
+            body = json_dumps(item['body']).encode()
+            headers['Content-Type'] = 'application/json'
+
+        request = self.app.request_class(
+            url.encode(), headers, parent.version,
+            item.get('method', 'GET').upper(), parent.transport)
+        request.app = self.app
+        request.body = body
+        request.batch_parent = parent
+
+        return request
+
+    async def _get_response(self, request):
+        handler, args, kwargs, uri = self.app.router.get(request)
+        request.uri_template = uri
+
+        # Whatever its path, a batch resource is not run by a batch item
+        if isinstance(unwrap(handler), BatchHandler):
+            raise ApiError('Batch items cannot be batches', 400)
+
+        if getattr(handler, 'is_stream', False):
+            raise ApiError('Streaming resources cannot be batched', 400)
+
+        response = handler(request, *args, **kwargs)
+        if isawaitable(response):
+            response = await response
+
+        if isinstance(response, StreamingHTTPResponse):
+            raise ApiError('Streaming responses cannot be batched', 400)
+
+        return response
+
+    @staticmethod
+    def _body(response):
+        # Rafter responses are added as is, they are serialized with the
+        # batch response.
+        if isinstance(response, Response):
+            return response.data
+
+        if not response.body:
+            return None
+
+        content_type = response.content_type.split(';')[0].strip()
+        if content_type == 'application/json' or \
+                content_type.endswith('+json'):
+            return json.loads(response.body.decode('utf-8'))
+
+        return response.body.decode('utf-8', 'replace')
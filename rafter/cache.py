@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Cache backends used by :func:`rafter.filters.filter_cache`.
+
+.. autoclass:: CacheEntry
+
+.. autoclass:: BaseCache
+
+    .. automethod:: get
+    .. automethod:: set
+    .. automethod:: delete
+    .. automethod:: clear
+
+.. autoclass:: MemoryCache
+
+.. autoclass:: FileCache
+"""
+
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+__all__ = ('CacheEntry', 'BaseCache', 'MemoryCache', 'FileCache')
+
+
+CacheEntry = namedtuple('CacheEntry', ('status', 'headers', 'content_type',
+                                       'body'))
+CacheEntry.__doc__ = """
+A cached response: status code, headers (dict), content type and encoded
+body (bytes).
+"""
+
+
+class BaseCache(object):
+    """
+    Base class of cache backends. Keys are strings and values are
+    :class:`CacheEntry` instances.
+    """
+
+    def get(self, key):
+        """
+        Returns the entry of ``key`` or ``None`` when it doesn't exist or
+        has expired.
+        """
+        raise NotImplementedError()
+
+    def set(self, key, entry, ttl):
+        """
+        Stores an entry for ``ttl`` seconds.
+        """
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """
+        Removes an entry.
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        raise NotImplementedError()
+
+
+class MemoryCache(BaseCache):
+    """
+    An in-process LRU cache. The least recently used entries are evicted
+    when there are more than ``max_entries`` entries or when the bodies
+    take more than ``max_size`` bytes.
+
+    :param max_entries: Maximum number of entries
+    :param max_size: Maximum size of all bodies, in bytes (optional)
+    """
+
+    def __init__(self, max_entries=1024, max_size=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        try:
+            expires, entry = self._entries[key]
+        except KeyError:
+            return None
+
+        if expires <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry, ttl):
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self.size += len(entry.body)
+
+        while len(self._entries) > self.max_entries or (
+                self.max_size is not None and self.size > self.max_size):
+            _, (_, old) = self._entries.popitem(last=False)
+            self.size -= len(old.body)
+
+    def delete(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1].body)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class FileCache(BaseCache):
+    """
+    A cache storing each entry in a file of ``directory``. All the workers
+    of a host can share the same directory (a ``tmpfs`` mount keeps it in
+    memory). Files are written atomically.
+
+    Every hit updates the file's modification time. Every ``prune_interval``
+    writes, the least recently used files are removed when there are more
+    than ``max_entries`` files.
+
+    :param directory: The cache directory (created if needed)
+    :param max_entries: Maximum number of entries
+    :param prune_interval: Number of writes between two prunes
+    """
+
+    def __init__(self, directory, max_entries=10000, prune_interval=100):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._writes = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.cache')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fp:
+                meta = json.loads(fp.readline().decode('utf-8'))
+                body = fp.read()
+        except (OSError, ValueError):
+            return None
+
+        if meta['expires'] <= time.time():
+            self.delete(key)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return CacheEntry(meta['status'], meta['headers'],
+                          meta['content_type'], body)
+
+    def set(self, key, entry, ttl):
+        meta = json.dumps({
+            'expires': time.time() + ttl,
+            'status': entry.status,
+            'headers': entry.headers,
+            'content_type': entry.content_type
+        })
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(meta.encode('utf-8') + b'\n')
+                fp.write(entry.body)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+        self._writes += 1
+        if self._writes >= self.prune_interval:
+            self._writes = 0
+            self.prune()
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+    def prune(self):
+        """
+        Removes the least recently used files above ``max_entries``.
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+
+        if len(files) <= self.max_entries:
+            return
+
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Content codings used by :func:`rafter.filters.filter_compress`.
+
+.. autodata:: default_levels
+
+.. autofunction:: available_encodings
+
+.. autofunction:: compress
+
+.. autofunction:: negotiate_encoding
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+__all__ = ('default_levels', 'available_encodings', 'compress',
+           'negotiate_encoding')
+
+
+default_levels = {
+    'br': 4,
+    'gzip': 6,
+    'deflate': 6
+}
+"""
+Default compression level of each content coding.
+"""
+
+
+def _gzip(data, level):
+    # zlib's gzip header has no timestamp, so that a body always gives the
+    # same output
+    c = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return c.compress(data) + c.flush()
+
+
+def _deflate(data, level):
+    return zlib.compress(data, level)
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+_compressors = {
+    'gzip': _gzip,
+    'deflate': _deflate
+}
+if brotli is not None:  # pragma: no cover
+    _compressors['br'] = _brotli
+
+
+def available_encodings():
+    """
+    Returns a tuple of the available content codings, by order of
+    preference. ``br`` is only available when the ``brotli`` package is
+    installed.
+    """
+    return tuple(e for e in ('br', 'gzip', 'deflate') if e in _compressors)
+
+
+def compress(encoding, data, level=None):
+    """
+    Compresses ``data`` (bytes) with a content coding and returns bytes.
+
+    :param encoding: ``br``, ``gzip`` or ``deflate``
+    :param level: The compression level (see :data:`default_levels`)
+    """
+    try:
+        func = _compressors[encoding]
+    except KeyError:
+        raise RuntimeError('Unsupported encoding: {}'.format(encoding))
+
+    if level is None:
+        level = default_levels[encoding]
+
+    return func(data, level)
+
+
+def negotiate_encoding(accept_encoding, encodings):
+    """
+    Returns the best content coding of ``encodings`` (ordered by
+    preference) for the value of an ``Accept-Encoding`` header, or ``None``
+    when the body should not be compressed.
+
+    Codings with the highest quality value win, ties are resolved with the
+    order of ``encodings``.
+    """
+    if not accept_encoding:
+        return None
+
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        parts = item.split(';')
+        coding = parts[0].strip().lower()
+        q = 1.0
+        for p in parts[1:]:
+            k, _, v = p.partition('=')
+            if k.strip() == 'q':
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qvalues[coding] = q
+
+    best = None
+    best_q = 0.0
+    for encoding in encodings:
+        q = qvalues.get(encoding, qvalues.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+
+    return best
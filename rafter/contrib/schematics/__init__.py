@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from .app import *         # noqa
+from .compiler import *    # noqa
 from .exceptions import *  # noqa
 from .filters import *     # noqa
 from .helpers import *     # noqa
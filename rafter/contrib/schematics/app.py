@@ -6,6 +6,10 @@
 from rafter.app import Rafter
 from rafter.contrib.schematics.filters import (
     filter_validate_schemas, filter_validate_response)
+from rafter.filters import (
+    filter_cache, filter_compress, filter_concurrency, filter_etag,
+    filter_projection, filter_rate_limit, filter_serialize,
+    filter_single_flight, filter_transform_response)
 
 __all__ = ('RafterSchematics', )
 
@@ -25,12 +29,29 @@ class RafterSchematics(Rafter):
         :param response_schema: Schema for response data
     """
 
-    default_filters = \
-        [filter_validate_schemas] \
-        + Rafter.default_filters \
-        + [filter_validate_response]
+    default_filters = [
+        filter_validate_schemas,
+        filter_transform_response,
+        filter_projection,
+        filter_validate_response,
+        filter_serialize,
+        filter_concurrency,
+        filter_compress,
+        filter_single_flight,
+        filter_cache,
+        filter_etag,
+        filter_rate_limit
+    ]
     """
     - Validate request data
-    - Pass Rafter's default filters
+    - Transform the response
+    - Select the fields requested by the client
     - Validate output data
+    - Serialize the response (in the app's executor for large bodies)
+    - Limit the number of concurrent requests
+    - Compress the response
+    - Coalesce identical concurrent requests
+    - Cache the validated response
+    - Handle conditional requests
+    - Limit the request rate of each client
     """
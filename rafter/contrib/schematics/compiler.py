@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+.. autofunction:: compile_request_schema
+
+.. autoclass:: CompiledRequestSchema
+
+    .. automethod:: extract_params
+    .. automethod:: validate
+    .. automethod:: validate_stream
+    .. automethod:: validate_items
+
+.. autofunction:: compile_response_schema
+
+.. autoclass:: CompiledResponseSchema
+
+    .. automethod:: serialize
+    .. automethod:: serialize_item
+    .. automethod:: serialize_headers
+"""
+
+from copy import deepcopy
+from weakref import WeakKeyDictionary
+
+from schematics.exceptions import BaseError
+from schematics.models import Model
+from schematics.transforms import to_native, to_primitive
+from schematics.types import ListType, ModelType
+from schematics.validate import validate
+
+from rafter.contrib.schematics.exceptions import ValidationErrors
+
+__all__ = ('compile_request_schema', 'CompiledRequestSchema',
+           'compile_response_schema', 'CompiledResponseSchema')
+
+_compiled_requests = WeakKeyDictionary()
+_compiled_responses = WeakKeyDictionary()
+_model_validators = WeakKeyDictionary()
+
+_validation_options = {
+    'partial': False,
+    'strict': False,
+    'convert': True,
+    'init_values': True,
+    'apply_defaults': True
+}
+
+
+def _fields_schema(schema, suffix, fields):
+    # Returns a model holding a copy of some fields, in order to validate
+    # a part of the data on its own.
+    return type(schema.__name__ + suffix, (Model,),
+                dict((str(k), deepcopy(v)) for k, v in fields.items()))
+
+
+def _field_schema(schema, name, field):
+    if field is None:
+        return None
+
+    return _fields_schema(schema, name.title(), {name: field})
+
+
+def _field_models(field):
+    # Yields the model classes held by a field (nested or in a container)
+    if isinstance(field, ModelType):
+        yield field.model_class
+
+    inner = getattr(field, 'field', None)
+    if inner is not None:
+        yield from _field_models(inner)
+
+
+def _has_validators(schema, seen=None):
+    # Model validators (including "validate_<field>" methods of nested
+    # models) are only called on model instances.
+    try:
+        return _model_validators[schema]
+    except KeyError:
+        pass
+
+    top = seen is None
+    seen = seen or set()
+    seen.add(schema)
+
+    result = bool(schema._schema.validators) or any(
+        _has_validators(model, seen)
+        for field in schema._schema.fields.values()
+        for model in _field_models(field) if model not in seen)
+
+    # On a cycle, the models being explored are skipped: a False result is
+    # only final once the whole graph of the first model has been explored.
+    if result or top:
+        _model_validators[schema] = result
+    return result
+
+
+def _validate_native(schema, data):
+    if _has_validators(schema):
+        model = schema(data, strict=False, validate=False)
+        model.validate()
+        return model.to_native()
+
+    result = validate(schema._schema, {}, raw_data=data,
+                      **_validation_options)
+    return to_native(schema._schema, result)
+
+
+def _validate_primitive(schema, data):
+    if _has_validators(schema):
+        model = schema(data, strict=False, validate=False)
+        model.validate()
+        return model.to_primitive()
+
+    result = validate(schema._schema, {}, raw_data=data,
+                      **_validation_options)
+    return to_primitive(schema._schema, result)
+
+
+def _param_fields(node):
+    # Returns a tuple of (input name, is a list) for each input name of the
+    # fields of a node.
+    if node is None or not hasattr(node, 'fields'):
+        return None
+
+    fields = []
+    for sc in node.fields.values():
+        is_list = isinstance(sc, ListType)
+        fields.append((sc.serialized_name or sc.name, is_list))
+        fields.extend((k, is_list) for k in sc.deserialize_from)
+
+    return tuple(fields)
+
+
+class CompiledRequestSchema(object):
+    """
+    A request schema prepared once, when the resource is registered.
+
+    It holds the list of fields to read from multi-valued parameters
+    (query string and form body) and validates the request data
+    with a single conversion and validation pass, instead of building,
+    validating and exporting a model instance.
+
+    For streaming resources, the body is validated item by item with
+    :meth:`validate_items` and the rest of the data with
+    :meth:`validate_stream`.
+
+    :param schema: a ``schematics.Model`` class
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.params_fields = _param_fields(getattr(schema, 'params', None))
+        self.body_fields = _param_fields(getattr(schema, 'body', None))
+
+        # Model validators expect a model instance.
+        self.use_model = _has_validators(schema)
+
+        # Streaming resources validate their body item by item.
+        fields = schema._schema.fields
+        body = fields.get('body')
+        self.body_item_schema = _field_schema(
+            schema, 'item', body.field if isinstance(body, ListType) else body)
+        self.stream_schema = _fields_schema(
+            schema, 'Stream',
+            dict((k, v) for k, v in fields.items() if k != 'body'))
+
+    @staticmethod
+    def extract_params(fields, data):
+        """
+        Returns a new dict with the values of the precomputed ``fields`` from
+        a multi-valued mapping (``RequestParameters``). Lists are kept for
+        list fields, other fields get their first value.
+
+        Only the schema's fields are read, the mapping is neither copied nor
+        modified.
+        """
+        result = {}
+        for name, is_list in fields:
+            val = data.getlist(name)
+            if val is None:
+                continue
+
+            if len(val) == 1 and not is_list:
+                val = val[0]
+
+            result[name] = val
+
+        return result
+
+    def validate(self, data):
+        """
+        Validates and converts ``data``. Returns the native values or raises
+        :class:`rafter.contrib.schematics.exceptions.ValidationErrors`.
+        """
+        try:
+            return _validate_native(self.schema, dict(data))
+        except BaseError as e:
+            raise ValidationErrors(e.to_primitive())
+
+    def validate_stream(self, data):
+        """
+        Validates and converts ``data`` of a streaming resource, without
+        its body. Returns the native values or raises
+        :class:`rafter.contrib.schematics.exceptions.ValidationErrors`.
+        """
+        try:
+            return _validate_native(self.stream_schema, dict(data))
+        except BaseError as e:
+            raise ValidationErrors(e.to_primitive())
+
+    async def validate_items(self, items):
+        """
+        Asynchronously iterates over ``items`` (an asynchronous iterable)
+        and yields them once validated and converted against the items of
+        the schema's ``body`` (or the whole ``body`` if it's not a list).
+
+        Raises :class:`rafter.contrib.schematics.exceptions.ValidationErrors`
+        on the first invalid item. Its location starts with ``body`` and the
+        item's index.
+        """
+        schema = self.body_item_schema
+        index = 0
+        async for item in items:
+            if schema is not None:
+                try:
+                    item = _validate_native(schema, {'item': item})['item']
+                except BaseError as e:
+                    raise ValidationErrors(
+                        {'body': {index: e.to_primitive()['item']}})
+
+            yield item
+            index += 1
+
+
+def compile_request_schema(schema):
+    """
+    Returns the :class:`CompiledRequestSchema` of a request schema. The
+    result is cached for each schema class.
+    """
+    try:
+        return _compiled_requests[schema]
+    except KeyError:
+        compiled = _compiled_requests[schema] = CompiledRequestSchema(schema)
+        return compiled
+
+
+class CompiledResponseSchema(object):
+    """
+    A response schema prepared once, when the resource is registered.
+
+    It validates the response data and converts it to primitive values in
+    a single pass, instead of building, validating and exporting a model
+    instance.
+
+    When the schema's ``body`` is a list, the items of a streaming response
+    can be validated one by one with :meth:`serialize_item`.
+
+    :param schema: a ``schematics.Model`` class
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.use_model = _has_validators(schema)
+
+        fields = schema._schema.fields
+        body = fields.get('body')
+        self.item_schema = _field_schema(
+            schema, 'item',
+            body.field if isinstance(body, ListType) else None)
+        self.headers_schema = _field_schema(schema, 'headers',
+                                            fields.get('headers'))
+
+    def serialize(self, body, headers):
+        """
+        Validates the response's ``body`` and ``headers`` and returns a tuple
+        of their primitive values.
+
+        Raises a ``schematics.exceptions.BaseError`` when data are invalid.
+        """
+        result = _validate_primitive(self.schema,
+                                     {'body': body, 'headers': headers})
+
+        return result.get('body', None), result.get('headers', {})
+
+    def serialize_item(self, item):
+        """
+        Validates an item of the response's body (when the body is a list)
+        and returns its primitive value.
+
+        Raises a ``schematics.exceptions.BaseError`` when data are invalid
+        and a ``TypeError`` when the body is not a list.
+        """
+        if self.item_schema is None:
+            raise TypeError('response schema body is not a list.')
+
+        return _validate_primitive(self.item_schema, {'item': item})['item']
+
+    def serialize_headers(self, headers):
+        """
+        Validates the response's ``headers`` and returns their primitive
+        value.
+
+        Raises a ``schematics.exceptions.BaseError`` when data are invalid.
+        """
+        if self.headers_schema is None:
+            return {}
+
+        return _validate_primitive(self.headers_schema,
+                                   {'headers': headers})['headers']
+
+
+def compile_response_schema(schema):
+    """
+    Returns the :class:`CompiledResponseSchema` of a response schema. The
+    result is cached for each schema class.
+    """
+    try:
+        return _compiled_responses[schema]
+    except KeyError:
+        compiled = _compiled_responses[schema] = \
+            CompiledResponseSchema(schema)
+        return compiled
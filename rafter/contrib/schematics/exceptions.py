@@ -7,8 +7,6 @@
 
 """
 
-from operator import itemgetter
-
 from rafter.exceptions import ApiError
 
 __all__ = ('ValidationErrors',)
@@ -19,6 +17,7 @@ class ValidationErrors(ApiError):
         super(ValidationErrors, self).__init__('Invalid input data', 400,
                                                **kwargs)
         self._errors = errors
+        self._error_list = None
 
     @property
     def data(self):
@@ -34,7 +33,8 @@ class ValidationErrors(ApiError):
     def error_list(self):
         """
         Returns an error list based on the internal error dict values.
-        Each item contains a dict with ``messages`` and ``path`` keys.
+        Each item contains a dict with ``messages`` and ``path`` keys,
+        sorted by path. It is built once, on first access.
 
         Example::
 
@@ -58,18 +58,25 @@ class ValidationErrors(ApiError):
                  'location': ['body', 'options', 'extra', 'ex1']},
             ]
         """
-        return sorted(self._walk(self._errors), key=itemgetter('location'))
+        if self._error_list is None:
+            self._error_list = _flatten(self._errors)
+        return self._error_list
 
-    def _walk(self, d, path=[]):
-        nested_keys = tuple(k for k in d.keys() if isinstance(d[k], dict))
-        items = tuple((k, d[k]) for k in d.keys() if k not in nested_keys)
 
-        for p, v in items:
-            yield {
-                'location': path + [p],
-                'messages': v
-            }
+def _flatten(errors):
+    # Depth first walk of the error tree, keys in order: the locations
+    # come out sorted.
+    result = []
+    stack = [((), iter(sorted(errors.items())))]
+    while stack:
+        path, items = stack[-1]
+        for key, value in items:
+            if isinstance(value, dict):
+                stack.append((path + (key,), iter(sorted(value.items()))))
+                break
+            result.append({'location': list(path) + [key],
+                           'messages': value})
+        else:
+            stack.pop()
 
-        for k in nested_keys:
-            for res in self._walk(d[k], path + [k]):
-                yield res
+    return result
@@ -4,18 +4,17 @@
 .. autofunction:: filter_validate_response
 """
 
-from copy import deepcopy
 import logging
 
-from sanic.exceptions import abort
-from sanic.request import RequestParameters
+from sanic.exceptions import InvalidUsage, abort
+from sanic.request import json_loads
 from sanic.response import HTTPResponse
-from sanic.server import CIDict
 from schematics.exceptions import BaseError
-from schematics.types import ListType
 
+from rafter.contrib.schematics.compiler import (
+    compile_request_schema, compile_response_schema)
 from rafter.contrib.schematics.exceptions import ValidationErrors
-from rafter.http import Response
+from rafter.http import Response, StreamingResponse
 
 log = logging.getLogger(__name__)
 
@@ -31,6 +30,20 @@ def filter_validate_schemas(get_response, params):
     is of a form type) will be converted using the schema in order to get
     proper lists or unique values.
 
+    The schema is compiled once, when the resource is registered
+    (see :func:`rafter.contrib.schematics.compiler.compile_request_schema`).
+
+    When the app has an ``executor`` and the JSON body is at least
+    ``offload_size`` bytes long, the body is parsed and validated in the
+    executor (see :meth:`rafter.app.Rafter.offload`). With a
+    ``ProcessPoolExecutor``, the schema must be importable (defined at the
+    module level).
+
+    On streaming resources (``stream=True``), the body is not read before
+    calling the resource. ``request.validated['body']`` is an asynchronous
+    iterator over the items of the JSON array or NDJSON body, validated
+    one by one as they arrive (see :meth:`rafter.http.Request.iter_json`).
+
     .. important::
         The request validation is only effective when a
         ``request_schema`` has been provided by the resource definition.
@@ -41,47 +54,100 @@ def filter_validate_schemas(get_response, params):
     if request_schema is None:
         return get_response
 
-    def _convert_params(schema, data):
-        for sc in schema.fields.values():
-            name = sc.serialized_name or sc.name
-            val = data.getlist(name)
-            if val is None:
-                continue
+    # Compiled once, when the resource is registered
+    compiled = compile_request_schema(request_schema)
 
-            if len(val) == 1 and not isinstance(sc, ListType):
-                val = val[0]
-
-            data[name] = val
+    if params.get('stream'):
+        return _validate_stream_schemas(get_response, compiled)
 
     async def decorated_filter(request, *args, **kwargs):
+        # Request data are passed as is or read through the schema's
+        # fields: the validation never modifies its input.
         data = {
-            'headers': CIDict(request.headers),
-            'path': request.app.router.get(request)[2],
-            'params': RequestParameters(request.args),
+            'headers': request.headers,
+            # Path parameters, as already matched by the router
+            'path': kwargs,
+            'params': request.args,
             'body': {}
         }
 
         if request.body:
+            offload = getattr(request.app, 'offload', None)
+            if offload is not None and offload(len(request.body)) and \
+                    not request.form:
+                request.validated = await _validate_in_executor(
+                    request, request_schema, data)
+                return await get_response(request, *args, **kwargs)
+
             # Get body if we have something there
             if request.form:
-                data['body'] = RequestParameters(request.form)
+                data['body'] = request.form
             else:
                 # will raise 400 if cannot parse json
-                data['body'] = deepcopy(request.json)
+                data['body'] = request.json
 
-        if hasattr(request_schema, 'body') and request.form:
-            _convert_params(request_schema.body, data['body'])
+        if compiled.body_fields is not None and request.form:
+            data['body'] = compiled.extract_params(compiled.body_fields,
+                                                   data['body'])
 
-        if hasattr(request_schema, 'params') and data['params']:
-            _convert_params(request_schema.params, data['params'])
+        if compiled.params_fields is not None and data['params']:
+            data['params'] = compiled.extract_params(compiled.params_fields,
+                                                     data['params'])
 
         # Now, validate the whole thing
-        try:
-            model = request_schema(data, strict=False, validate=False)
-            model.validate()
-            request.validated = model.to_native()
-        except BaseError as e:
-            raise ValidationErrors(e.to_primitive())
+        request.validated = compiled.validate(data)
+
+        return await get_response(request, *args, **kwargs)
+
+    return decorated_filter
+
+
+def _validate_json(schema, data, body):
+    # Runs in an executor, possibly in another process: exceptions are
+    # returned as (kind, value) as they don't all survive pickling.
+    try:
+        data['body'] = json_loads(body)
+    except Exception:
+        return 'json', None
+
+    compiled = compile_request_schema(schema)
+    if compiled.params_fields is not None and data['params']:
+        data['params'] = compiled.extract_params(compiled.params_fields,
+                                                 data['params'])
+
+    try:
+        return None, compiled.validate(data)
+    except ValidationErrors as e:
+        return 'errors', e._errors
+
+
+async def _validate_in_executor(request, schema, data):
+    error, result = await request.app.run_in_executor(
+        _validate_json, schema, data, request.body)
+
+    if error == 'json':
+        raise InvalidUsage('Failed when parsing body as json')
+    if error == 'errors':
+        raise ValidationErrors(result)
+
+    return result
+
+
+def _validate_stream_schemas(get_response, compiled):
+    async def decorated_filter(request, *args, **kwargs):
+        data = {
+            'headers': request.headers,
+            'path': kwargs,
+            'params': request.args
+        }
+
+        if compiled.params_fields is not None and data['params']:
+            data['params'] = compiled.extract_params(compiled.params_fields,
+                                                     data['params'])
+
+        request.validated = compiled.validate_stream(data)
+        request.validated['body'] = compiled.validate_items(
+            request.iter_json())
 
         return await get_response(request, *args, **kwargs)
 
@@ -100,19 +166,42 @@ def filter_validate_response(get_response, params):
     That means that you can always return a normal Sanic's HTTPResponse
     and thus, bypass the validation process when you need to do so.
 
+    When the response is a :class:`rafter.http.StreamingResponse`, its
+    headers are validated immediately and each item is validated against
+    the items of the schema's ``body`` list, as it is streamed.
+
+    When the client selected some fields (see
+    :func:`rafter.filters.filter_projection`), the whole data are validated
+    and the selection applies to the output, whose names are the
+    serialized names of the schema's fields.
+
     .. important::
         The response validation is only effective when:
 
         - A ``response_schema`` has been provided by the resource definition
         - The resource returns a :class:`rafter.http.Response` instance
           or arbitrary data.
+
+        Without ``response_schema``, the filter is left out of the
+        resource's filter chain.
     """
 
     schema = params.get('response_schema')
 
+    if schema is None:
+        return get_response
+
+    # Compiled once, when the resource is registered
+    compiled = compile_response_schema(schema)
+
     async def decorated_filter(request, *args, **kwargs):
         response = await get_response(request, *args, **kwargs)
 
+        projection = getattr(request, 'projection', None)
+
+        if isinstance(response, StreamingResponse):
+            return _validate_stream(compiled, response, projection)
+
         if isinstance(response, HTTPResponse) and \
                 not isinstance(response, Response):
             return response
@@ -121,22 +210,42 @@ def filter_validate_response(get_response, params):
             raise TypeError('response is not an instance '
                             'of rafter.http.Response.')
 
-        if schema:
-            data = {
-                'body': response.data,
-                'headers': response.headers
-            }
-
-            try:
-                model = schema(data, strict=False, validate=False)
-                model.validate()
-                result = model.to_primitive()
-                response.body = result.get('body', None)
-                response.headers.update(result.get('headers', {}))
-            except BaseError as e:
-                log.exception(e)
-                abort(500, 'Wrong data output')
+        try:
+            body, headers = compiled.serialize(response.data,
+                                               response.headers)
+            if projection is not None:
+                body = projection.apply(body)
+            response.body = body
+            response.headers.update(headers)
+        except BaseError as e:
+            log.exception(e)
+            abort(500, 'Wrong data output')
 
         return response
 
     return decorated_filter
+
+
+def _validate_stream(compiled, response, projection):
+    if compiled.item_schema is None:
+        raise TypeError('response schema body is not a list.')
+
+    try:
+        response.headers.update(compiled.serialize_headers(response.headers))
+    except BaseError as e:
+        log.exception(e)
+        abort(500, 'Wrong data output')
+
+    def validate_item(item):
+        # Headers are already sent, an invalid item stops the stream
+        try:
+            item = compiled.serialize_item(item)
+            if projection is not None:
+                item = projection.apply(item)
+            return item
+        except BaseError as e:
+            log.exception(e)
+            abort(500, 'Wrong data output')
+
+    response.add_transform(validate_item)
+    return response
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 """
 .. autofunction:: model_node
+
+.. autoclass:: PageParams
 """
 
-from schematics import types
+from schematics import Model, types
 
-__all__ = ('model_node',)
+__all__ = ('model_node', 'PageParams')
 
 
 def model_node(**kwargs):
@@ -42,3 +44,25 @@ def model_node(**kwargs):
         return types.ModelType(model, **kwargs)
 
     return decorator
+
+
+class PageParams(Model):
+    """
+    The ``limit`` and ``cursor`` query string parameters of a paginated
+    resource (see :class:`rafter.pagination.Paginator`). Use it as the
+    ``params`` node of a request schema, or subclass it to add other
+    parameters or to change the page size bounds:
+
+    .. code-block:: python
+
+        class ReqSchema(Model):
+            @model_node()
+            class params(PageParams):
+                limit = types.IntType(min_value=1, max_value=50, default=10)
+                author = types.IntType()
+
+    The ``limit`` is checked by the schema and the cursor by the paginator.
+    """
+
+    limit = types.IntType(min_value=1, max_value=100, default=20)
+    cursor = types.StringType()
@@ -27,7 +27,10 @@ import sys
 import traceback
 
 from sanic.exceptions import SanicException
-from sanic.response import json
+from sanic.response import HTTPResponse
+
+from rafter.http import Response
+from rafter.serializers import JSONSerializer
 
 __all__ = ('ApiError',)
 
@@ -35,16 +38,20 @@ log = logging.getLogger(__name__)
 
 
 class ApiError(SanicException):
-    def __init__(self, message: str, status_code: int=500, **kwargs):
+    def __init__(self, message: str, status_code: int=500, *,
+                 headers: dict = None, **kwargs):
         """
         :param message: An error message
         :param status_code: The returned HTTP status code
+        :param headers: Headers added to the error response
+                        (``Retry-After`` for instance)
 
         Any other keyword argument will be added to the error data and
         will be added to the return of
         :attr:`~rafter.exceptions.ApiError.data`.
         """
         super(ApiError, self).__init__(message, status_code=status_code)
+        self.headers = headers or {}
         self._data = kwargs
 
     @property
@@ -70,8 +77,25 @@ class ExceptionHandler(object):
     The callable returns a JSON response with structured error data.
     The original error message is never returned. Use any type of
     SanicException if you need to do so.
+
+    The error response is a :class:`rafter.http.Response`, serialized only
+    when it is sent. With ``static_bodies``, the encoded body is kept for
+    each status instead: the default handler of generic exceptions uses it,
+    as its data only depend on the status.
     """
 
+    serializer = JSONSerializer()
+
+    def __init__(self, static_bodies=False):
+        """
+        :param static_bodies: ``True`` when the data of the handled errors
+                              only depend on their status. Leave it to
+                              ``False`` when ``get_data`` returns data of the
+                              exception, like its message.
+        """
+        self.static_bodies = static_bodies
+        self._static_bodies = {}
+
     def __call__(self, request, exception):
         """
         If the data's status is superior or equal to 500, the exception
@@ -79,20 +103,35 @@ class ExceptionHandler(object):
         trace is also returned in the response.
         """
         data = self.get_data(request, exception)
+        status = data['status']
+        headers = self.get_headers(request, exception)
 
-        if data['status'] >= 500:
+        if status >= 500:
             log.exception(exception)
             if request.app.debug:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
                 data['stack'] = traceback.extract_tb(exc_traceback)
 
-        return json(data, data['status'])
+        if self.static_bodies and 'stack' not in data:
+            body = self._static_bodies.get(status)
+            if body is None:
+                body = self._static_bodies[status] = \
+                    self.serializer.dumps(data)
+
+            return HTTPResponse(body_bytes=body, status=status,
+                                headers=headers,
+                                content_type=self.serializer.content_type)
+
+        return Response(data, status, headers, serializer=self.serializer)
 
     def get_data(self, request, exception):
         data = {'status': 500,
                 'message': 'An error occured.'}
         return data
 
+    def get_headers(self, request, exception):
+        return None
+
 
 class SanicExceptionHandler(ExceptionHandler):
     """
@@ -100,6 +139,7 @@ class SanicExceptionHandler(ExceptionHandler):
 
     This handler returns the original error message in its data.
     """
+
     def get_data(self, request, exception):
         data = super(SanicExceptionHandler, self).get_data(request, exception)
         data.update({'status': getattr(exception, 'status_code', 500),
@@ -112,14 +152,17 @@ class ApiErrorHandler(SanicExceptionHandler):
     :class:`ApiError` handler.
 
     This handler returns all error data returned by
-    :func:`ApiError.to_primitive`.
+    :func:`ApiError.to_primitive` and the exception's headers.
     """
     def get_data(self, request, exception):
         data = super(ApiErrorHandler, self).get_data(request, exception)
         data.update(exception.to_primitive())
         return data
 
+    def get_headers(self, request, exception):
+        return dict(exception.headers) if exception.headers else None
+
 
 default_error_handlers = ((ApiError, ApiErrorHandler()),
                           (SanicException, SanicExceptionHandler()),
-                          (Exception, ExceptionHandler()))
+                          (Exception, ExceptionHandler(static_bodies=True)))
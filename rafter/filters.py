@@ -1,22 +1,183 @@
 # -*- coding: utf-8 -*-
 """
+.. autoclass:: Filter
+
+    .. autoattribute:: active
+    .. automethod:: before
+    .. automethod:: after
+
+.. autofunction:: build_pipeline
+
 .. autofunction:: filter_transform_response
+
+.. autofunction:: filter_projection
+
+.. autofunction:: filter_serialize
+
+.. autofunction:: filter_concurrency
+
+.. autofunction:: filter_compress
+
+.. autofunction:: filter_single_flight
+
+.. autofunction:: filter_cache
+
+.. autofunction:: filter_etag
+
+.. autofunction:: filter_rate_limit
 """
 
-from sanic.response import HTTPResponse
+from asyncio import (
+    CancelledError, TimeoutError as WaitTimeoutError, get_event_loop,
+    iscoroutinefunction, shield, wait_for)
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from inspect import isasyncgen, isawaitable, isgenerator
+import logging
+from math import ceil
+from urllib.parse import urlencode
+
+from sanic.response import HTTPResponse, StreamingHTTPResponse
+
+from rafter.cache import CacheEntry, MemoryCache
+from rafter.compression import (
+    available_encodings, compress, default_levels, negotiate_encoding)
+from rafter.exceptions import ApiError
+from rafter.http import Response, StreamingResponse
+from rafter.projection import compile_projection
+from rafter.ratelimit import MemoryBuckets
+
+log = logging.getLogger(__name__)
+
+
+class Filter(object):
+    """
+    Base class of pipeline filters.
+
+    A pipeline filter is an alternative to the function filters. Instead of
+    wrapping the next filter in a closure, it provides a :meth:`before`
+    and/or an :meth:`after` hook. Consecutive pipeline filters of a resource
+    are run by a single loop over precomputed hooks
+    (see :func:`build_pipeline`), saving a coroutine and a frame per filter.
+
+    The class (not an instance) is added to the filter list. It is
+    instantiated once per resource with the resource parameters.
+
+    Hooks can be regular functions or coroutines. Hooks that are not
+    overridden are not called at all. A filter that has nothing to do for
+    a resource should set :attr:`active` to ``False``; it is then left out
+    of the chain.
+
+    Example:
+
+    .. code-block:: python
+
+        class HeaderFilter(Filter):
+            def after(self, request, response):
+                response.headers['x-api'] = self.params.get('name', '')
+                return response
+
+    :param params: The resource parameters
+    """
+
+    active = True
+    """
+    Whether the filter takes part in the resource's filter chain.
+    """
+
+    def __init__(self, params):
+        self.params = params
+
+    def before(self, request, *args, **kwargs):
+        """
+        Called before the resource, with the same arguments. Return a
+        response to skip the next filters and the resource, or ``None`` to
+        go on.
+        """
+        return None
+
+    def after(self, request, response):
+        """
+        Called with the response of the next filter or the resource. It must
+        return a response.
+        """
+        return response
 
-from rafter.http import Response
+
+def _hooks(filters, name):
+    # Yields (position, hook, is a coroutine) for overridden hooks only
+    default = getattr(Filter, name)
+    for i, f in enumerate(filters):
+        hook = getattr(f, name)
+        if getattr(hook, '__func__', None) is not default:
+            yield i, hook, iscoroutinefunction(hook)
+
+
+def build_pipeline(get_response, filters):
+    """
+    Returns a coroutine running a list of :class:`Filter` instances around
+    ``get_response``. As for the function filters, the first filter of the
+    list is the closest to ``get_response``.
+
+    ``before`` hooks are called from the last filter to the first one,
+    ``after`` hooks from the first to the last one. When a ``before`` hook
+    returns a response, only the ``after`` hooks of the previous filters in
+    the chain (the ones that already ran their ``before`` hook) are called.
+
+    Inactive filters are ignored and ``get_response`` is returned as is
+    when there is nothing left to call.
+    """
+    filters = [f for f in filters if f.active]
+    befores = tuple(reversed(tuple(_hooks(filters, 'before'))))
+    afters = tuple(_hooks(filters, 'after'))
+
+    if not befores and not afters:
+        return get_response
+
+    async def pipeline(request, *args, **kwargs):
+        start = 0
+        for i, before, is_async in befores:
+            response = before(request, *args, **kwargs)
+            if is_async:
+                response = await response
+
+            if response is not None:
+                start = i + 1
+                break
+        else:
+            response = await get_response(request, *args, **kwargs)
+
+        for i, after, is_async in afters:
+            if i < start:
+                continue
+
+            response = after(request, response)
+            if is_async:
+                response = await response
+
+        return response
+
+    return pipeline
 
 
 def filter_transform_response(get_response, params):
     """
-    This filter process the returned response. It does 3 things:
+    This filter process the returned response. It does 5 things:
 
     - If the response is a ``sanic.response.HTTPResponse`` and not a
-      :class:`rafter.http.Response`, return it immediately.
+      :class:`rafter.http.Response`, or a streaming response, return it
+      immediately.
+    - If the response is a generator or an asynchronous generator, turn it
+      to a :class:`rafter.http.StreamingResponse`.
     - If the response is not a :class:`rafter.http.Response` instance,
       turn it to a :class:`rafter.http.Response` instance with the response
       as data.
+    - If the Response has no serializer nor content type, pick a serializer
+      from the app's ``serializers`` registry according to the request's
+      ``Accept`` header (and add ``Accept`` to the ``Vary`` header when the
+      registry holds several serializers).
     - Then, return the Response instance.
 
     As the Response instance is not immediately serialized, you can still
@@ -26,13 +187,751 @@ def filter_transform_response(get_response, params):
     async def decorated_filter(request, *args, **kwargs):
         response = await get_response(request, *args, **kwargs)
 
-        if isinstance(response, HTTPResponse) and \
+        if isinstance(response, (HTTPResponse, StreamingHTTPResponse)) and \
                 not isinstance(response, Response):
             return response
 
+        if isgenerator(response) or isasyncgen(response):
+            return StreamingResponse(response)
+
         if not isinstance(response, Response):
             response = Response(response)
 
+        if response.is_negotiable:
+            serializers = getattr(request.app, 'serializers', None)
+            if serializers:
+                response.serializer = serializers.negotiate(
+                    request.headers.get('accept'))
+                if len(serializers) > 1:
+                    _add_vary(response.headers, 'Accept')
+
         return response
 
     return decorated_filter
+
+
+def filter_projection(get_response, params):
+    """
+    This filter returns the fields of the response data selected by the
+    client with a ``fields`` query string parameter, like
+    ``?fields=id,title,author(name,email)`` (see
+    :func:`rafter.projection.compile_projection`). It is enabled by the
+    ``fields`` resource parameter, set to ``True`` or to a dict of options:
+
+    - ``param``: Name of the query string parameter (default: ``fields``)
+    - ``max_length``: Maximum length of the selector (default: 1024)
+
+    The projection is compiled once per distinct selector and set as the
+    request's ``projection``. The data of a :class:`rafter.http.Response`
+    are pruned before their serialization, and the items of a
+    :class:`rafter.http.StreamingResponse` as they are streamed. Other
+    responses are left untouched. An invalid selector is a 400 error.
+
+    Selected names are output names. When the resource has a
+    ``response_schema``, which can rename fields, the data are left as is
+    and the projection is applied to the validated output by
+    :func:`rafter.contrib.schematics.filters.filter_validate_response`.
+
+    .. code-block:: python
+
+        @app.resource('/posts/<id>', fields=True)
+        async def post(request, id):
+            return await load_post(id)
+    """
+    options = params.get('fields')
+    if not options:
+        return get_response
+    if options is True:
+        options = {}
+
+    name = options.get('param', 'fields')
+    max_length = options.get('max_length', 1024)
+    prune = params.get('response_schema') is None
+
+    async def decorated_filter(request, *args, **kwargs):
+        selector = request.args.get(name)
+        if not selector:
+            return await get_response(request, *args, **kwargs)
+
+        if len(selector) > max_length:
+            raise ApiError('Field selection is too long', 400)
+        try:
+            projection = compile_projection(selector)
+        except ValueError as e:
+            raise ApiError(str(e), 400, param=name)
+
+        request.projection = projection
+        response = await get_response(request, *args, **kwargs)
+
+        if not prune:
+            return response
+        if isinstance(response, StreamingResponse):
+            response.add_transform(projection.apply)
+        elif isinstance(response, Response):
+            response.data = projection.apply(response.data)
+
+        return response
+
+    return decorated_filter
+
+
+def _query_key(request, query):
+    args = request.args
+    if query is None:
+        names = sorted(args)
+    else:
+        names = [k for k in query if k in args]
+
+    return urlencode([(k, args.getlist(k)) for k in names], doseq=True)
+
+
+def _cache_key(request, query, headers):
+    parts = [request.method, request.path, _query_key(request, query)]
+    parts.extend(request.headers.get(h, '') for h in headers)
+
+    return '\x00'.join(parts)
+
+
+def filter_serialize(get_response, params):
+    """
+    When the app has an ``executor``, this filter serializes the body of
+    :class:`rafter.http.Response` instances. If the body is expected to be
+    at least ``offload_size`` bytes long, it is serialized in the executor,
+    so that encoding a large payload doesn't block the event loop (see
+    :meth:`rafter.app.Rafter.offload`). Without executor, the filter is
+    not added.
+
+    The expected size is given by
+    :attr:`rafter.http.Response.expected_size`.
+    """
+    app = params.get('app')
+    if getattr(app, 'executor', None) is None:
+        return get_response
+
+    async def decorated_filter(request, *args, **kwargs):
+        response = await get_response(request, *args, **kwargs)
+
+        if not isinstance(response, Response) or response.is_serialized:
+            return response
+
+        if app.offload(response.expected_size):
+            await response.serialize_in_executor(app.executor)
+        return response
+
+    return decorated_filter
+
+
+class _Limiter(object):
+    # Admission control of a resource: at most `limit` running requests
+    # and `queue` waiting ones. A released slot is handed over to the
+    # oldest waiting request.
+    def __init__(self, limit, queue, timeout):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiters = deque()
+
+    async def acquire(self):
+        # Returns False when the request is rejected
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return True
+
+        if len(self.waiters) >= self.queue:
+            return False
+
+        waiter = get_event_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await wait_for(waiter, self.timeout)
+        except WaitTimeoutError:
+            self._abandon(waiter)
+            return False
+        except CancelledError:
+            self._abandon(waiter)
+            raise
+
+        return True
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.active -= 1
+
+    def _abandon(self, waiter):
+        # The slot may have been handed over as the wait ended
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+            return
+
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def filter_concurrency(get_response, params):
+    """
+    This filter limits the number of concurrent requests of a resource on
+    a worker. It is enabled by the following resource parameters:
+
+    - ``max_concurrency``: The maximum number of requests running the
+      resource at the same time
+    - ``max_queue``: The maximum number of requests waiting for their turn
+      (default: ``max_concurrency``)
+    - ``queue_timeout``: The maximum time, in seconds, a request waits for
+      its turn (default: no limit)
+    - ``retry_after``: The ``Retry-After`` value of rejected requests, in
+      seconds (default: 1)
+
+    When the queue is full, or when a request has waited for too long, it
+    is rejected at once with a 503 :class:`rafter.exceptions.ApiError`
+    and a ``Retry-After`` header.
+
+    The filter runs after the request and response validation and the
+    serialization, but before the response cache: cache hits don't take
+    a slot.
+
+    .. code-block:: python
+
+        @app.resource('/reports', max_concurrency=4, max_queue=20,
+                      queue_timeout=5)
+        async def reports(request):
+            return await build_report()
+    """
+    limit = params.get('max_concurrency')
+    if not limit:
+        return get_response
+
+    limiter = _Limiter(limit, params.get('max_queue', limit),
+                       params.get('queue_timeout'))
+    retry_after = str(params.get('retry_after', 1))
+
+    async def decorated_filter(request, *args, **kwargs):
+        if not await limiter.acquire():
+            raise ApiError('Service overloaded, try again later', 503,
+                           headers={'Retry-After': retry_after})
+
+        try:
+            return await get_response(request, *args, **kwargs)
+        finally:
+            limiter.release()
+
+    return decorated_filter
+
+
+def _add_vary(headers, name):
+    vary = headers.get('Vary')
+    if not vary:
+        headers['Vary'] = name
+    elif name.lower() not in (v.strip().lower() for v in vary.split(',')):
+        headers['Vary'] = '{}, {}'.format(vary, name)
+
+
+class _Compressor(object):
+    # Options and state of a compression filter
+    def __init__(self, options):
+        self.min_size = options.get('min_size', 1024)
+        self.level = options.get('level', {})
+        if not isinstance(self.level, dict):
+            self.level = dict((k, self.level) for k in default_levels)
+        self.encodings = tuple(
+            e for e in options.get('encodings', available_encodings())
+            if e in available_encodings())
+        self.executor_size = options.get('executor_size', 65536)
+        self.memo_size = options.get('memo_size', 128)
+        self._memo = OrderedDict()
+        self._negotiated = {}
+
+    def negotiate(self, accept_encoding):
+        try:
+            return self._negotiated[accept_encoding]
+        except KeyError:
+            pass
+
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if len(self._negotiated) >= 256:
+            self._negotiated.clear()
+        self._negotiated[accept_encoding] = encoding
+
+        return encoding
+
+    async def compress(self, encoding, body):
+        key = None
+        if self.memo_size:
+            key = (encoding, blake2b(body, digest_size=16).digest())
+            try:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+            except KeyError:
+                pass
+
+        level = self.level.get(encoding)
+        if self.executor_size is not None and \
+                len(body) >= self.executor_size:
+            result = await get_event_loop().run_in_executor(
+                None, compress, encoding, body, level)
+        else:
+            result = compress(encoding, body, level)
+
+        if key is not None:
+            self._memo[key] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+        return result
+
+
+def filter_compress(get_response, params):
+    """
+    This filter compresses response bodies according to the request's
+    ``Accept-Encoding`` header, with ``br`` (when the ``brotli`` package is
+    installed), ``gzip`` or ``deflate``.
+
+    It is enabled by the ``compress`` resource parameter, set to ``True``
+    or to a dict of options:
+
+    - ``min_size``: Smaller bodies are not compressed (default: 1024)
+    - ``level``: The compression level, an int or a dict by encoding
+      (default: :data:`rafter.compression.default_levels`)
+    - ``encodings``: Allowed encodings, by order of preference
+    - ``executor_size``: Bodies of this size or more are compressed in the
+      event loop's default executor (default: 65536, ``None`` to disable)
+    - ``memo_size``: Number of compressed bodies kept, to avoid compressing
+      an identical body twice (default: 128, 0 to disable)
+
+    The compressed body is sent in a new response, the original body is
+    left untouched. As the filter runs before the response cache, cache
+    hits send the stored compressed variant without compressing it again.
+    """
+    options = params.get('compress')
+    if not options:
+        return get_response
+
+    compressor = _Compressor({} if options is True else options)
+
+    async def decorated_filter(request, *args, **kwargs):
+        response = await get_response(request, *args, **kwargs)
+
+        if isinstance(response, StreamingHTTPResponse) or \
+                response.status in (204, 304) or \
+                'Content-Encoding' in response.headers:
+            return response
+
+        body = response.body
+        if len(body) < compressor.min_size:
+            return response
+
+        _add_vary(response.headers, 'Accept-Encoding')
+
+        encoding = compressor.negotiate(
+            request.headers.get('accept-encoding', ''))
+        if encoding is None:
+            return response
+
+        body = await compressor.compress(encoding, body)
+        headers = dict(response.headers)
+        headers['Content-Encoding'] = encoding
+        return HTTPResponse(body_bytes=body,
+                            status=response.status, headers=headers,
+                            content_type=response.content_type)
+
+    return decorated_filter
+
+
+def filter_single_flight(get_response, params):
+    """
+    This filter coalesces identical concurrent ``GET`` and ``HEAD``
+    requests. While a request (the leader) is running, the identical
+    requests that come in wait for its response instead of calling the
+    resource again. They get a copy of the leader's status, headers and
+    encoded body, so the data is only serialized once.
+
+    It is enabled by the ``single_flight`` resource parameter, set to
+    ``True`` or to a dict of options:
+
+    - ``query``: Names of the query string parameters that tell requests
+      apart (default: all of them)
+    - ``headers``: Names of the request headers that tell requests apart
+      (default: ``Accept`` and ``Accept-Encoding``)
+
+    Requests are identical when they have the same route, path parameters,
+    selected query parameters and headers. When the leader fails, the
+    waiting requests get the same error. Streaming responses can't be
+    shared: waiting requests call the resource themselves, as they do when
+    the leader is cancelled (its client went away).
+    """
+    options = params.get('single_flight')
+    if not options:
+        return get_response
+    if options is True:
+        options = {}
+
+    query = options.get('query')
+    headers = tuple(h.lower() for h in
+                    options.get('headers', ('accept', 'accept-encoding')))
+    uri = params.get('uri', '')
+    in_flight = {}
+
+    async def decorated_filter(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await get_response(request, *args, **kwargs)
+
+        parts = [request.method, uri, _query_key(request, query)]
+        parts.extend('{}={}'.format(k, kwargs[k]) for k in sorted(kwargs))
+        parts.extend(request.headers.get(h, '') for h in headers)
+        key = '\x00'.join(parts)
+
+        future = in_flight.get(key)
+        if future is not None:
+            entry = await shield(future)
+            if entry is None:
+                return await get_response(request, *args, **kwargs)
+
+            return HTTPResponse(body_bytes=entry.body, status=entry.status,
+                                headers=dict(entry.headers),
+                                content_type=entry.content_type)
+
+        future = in_flight[key] = get_event_loop().create_future()
+        try:
+            response = await get_response(request, *args, **kwargs)
+            entry = None
+            if not isinstance(response, StreamingHTTPResponse):
+                entry = CacheEntry(response.status, dict(response.headers),
+                                   response.content_type, response.body)
+        except CancelledError:
+            # Waiting requests were not cancelled, they run on their own
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Not an error when nobody was waiting
+            raise
+        finally:
+            del in_flight[key]
+
+        future.set_result(entry)
+        return response
+
+    return decorated_filter
+
+
+def _is_cacheable(response, statuses):
+    if isinstance(response, StreamingHTTPResponse) or \
+            response.status not in statuses:
+        return False
+
+    # Cookies belong to a client (Sanic keeps them under MultiHeader keys)
+    if getattr(response, '_cookies', None) or \
+            not all(isinstance(k, str) for k in response.headers):
+        return False
+
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    return 'no-store' not in cache_control and 'private' not in cache_control
+
+
+def filter_cache(get_response, params):
+    """
+    This filter caches the encoded responses of a resource. It is enabled
+    by the ``cache`` resource parameter, set to ``True`` or to a dict of
+    options:
+
+    - ``ttl``: Lifetime of an entry, in seconds (default: 60)
+    - ``backend``: A :class:`rafter.cache.BaseCache` instance (default: a
+      :class:`rafter.cache.MemoryCache` for the resource)
+    - ``query``: Names of the query string parameters that are part of the
+      cache key (default: all of them)
+    - ``headers``: Names of the request headers that are part of the cache
+      key (default: ``Accept`` and ``Accept-Encoding``)
+    - ``methods``: Cached request methods (default: ``GET`` and ``HEAD``)
+    - ``statuses``: Cached response status codes (default: 200)
+
+    The key is made of the request method, path, selected query parameters
+    and headers. Responses with a ``Cache-Control: no-store`` or ``private``
+    header, responses setting cookies and streaming responses are not
+    stored. Errors of the backend while storing a response are logged, and
+    the response is sent as usual.
+
+    On a hit, the stored status, headers and body are sent back without
+    calling the next filters and the resource. Filters added after this one
+    (``validators`` for instance) still run on every request.
+
+    .. code-block:: python
+
+        @app.resource('/countries', cache={'ttl': 300, 'query': ['lang']})
+        async def countries(request):
+            return load_countries(request.args.get('lang'))
+    """
+    options = params.get('cache')
+    if not options:
+        return get_response
+    if options is True:
+        options = {}
+
+    ttl = options.get('ttl', 60)
+    backend = options.get('backend')
+    if backend is None:
+        backend = MemoryCache()
+    query = options.get('query')
+    headers = tuple(h.lower() for h in
+                    options.get('headers', ('accept', 'accept-encoding')))
+    methods = frozenset(m.upper() for m in
+                        options.get('methods', ('GET', 'HEAD')))
+    statuses = frozenset(options.get('statuses', (200,)))
+
+    async def decorated_filter(request, *args, **kwargs):
+        if request.method not in methods:
+            return await get_response(request, *args, **kwargs)
+
+        key = _cache_key(request, query, headers)
+        entry = backend.get(key)
+        if entry is not None:
+            return HTTPResponse(body_bytes=entry.body, status=entry.status,
+                                headers=dict(entry.headers),
+                                content_type=entry.content_type)
+
+        response = await get_response(request, *args, **kwargs)
+
+        if _is_cacheable(response, statuses):
+            entry = CacheEntry(response.status, dict(response.headers),
+                               response.content_type, response.body)
+            try:
+                backend.set(key, entry, ttl)
+            except Exception:
+                # The response is fine, it is just not stored
+                log.exception('Could not store a response in the cache')
+
+        return response
+
+    return decorated_filter
+
+
+def _etag_matches(etag, if_none_match):
+    if if_none_match.strip() == '*':
+        return True
+
+    # If-None-Match uses the weak comparison
+    etag = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == etag:
+            return True
+
+    return False
+
+
+def _http_date(value):
+    if not isinstance(value, datetime):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(etag, if_none_match)
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        return last_modified <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def _validator_headers(etag, last_modified):
+    headers = {}
+    if etag is not None:
+        headers['ETag'] = etag
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+
+    return headers
+
+
+def filter_etag(get_response, params):
+    """
+    This filter handles conditional ``GET`` and ``HEAD`` requests. It sends
+    ``ETag`` and ``Last-Modified`` headers and returns an empty
+    ``304 Not Modified`` response when the request's ``If-None-Match`` (or
+    ``If-Modified-Since``) header matches.
+
+    It is enabled by the following resource parameters:
+
+    - ``etag``: Either ``True``, the ETag is then a hash of the encoded
+      response body, or a function returning a version string of the
+      resource. The function receives the resource arguments and can be a
+      coroutine. Its result is used as a strong ETag.
+    - ``last_modified``: A function (or a coroutine) receiving the resource
+      arguments and returning the last modification date of the resource
+      (a ``datetime``, naive values are UTC, or a timestamp).
+
+    With a version or a last modification function, the resource itself
+    is not called when the client already has the current version.
+
+    .. code-block:: python
+
+        def article_version(request, id):
+            return str(db.get_article_version(id))
+
+        @app.resource('/articles/<id>', etag=article_version)
+        async def article(request, id):
+            return await db.get_article(id)
+    """
+    etag_option = params.get('etag')
+    last_modified_func = params.get('last_modified')
+    if not etag_option and not last_modified_func:
+        return get_response
+
+    version_func = etag_option if callable(etag_option) else None
+
+    async def call(func, request, *args, **kwargs):
+        result = func(request, *args, **kwargs)
+        if isawaitable(result):
+            result = await result
+        return result
+
+    async def decorated_filter(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await get_response(request, *args, **kwargs)
+
+        etag = last_modified = None
+        if version_func is not None:
+            version = await call(version_func, request, *args, **kwargs)
+            if version is not None:
+                etag = '"{}"'.format(version)
+        if last_modified_func is not None:
+            last_modified = await call(last_modified_func,
+                                       request, *args, **kwargs)
+            if last_modified is not None:
+                last_modified = _http_date(last_modified)
+
+        if (etag is not None or last_modified is not None) and \
+                _not_modified(request, etag, last_modified):
+            return HTTPResponse(
+                status=304, headers=_validator_headers(etag, last_modified))
+
+        response = await get_response(request, *args, **kwargs)
+
+        if isinstance(response, StreamingHTTPResponse) or \
+                response.status != 200:
+            return response
+
+        if etag is None and etag_option is True:
+            etag = response.headers.get('ETag')
+            if etag is None:
+                etag = '"{}"'.format(
+                    blake2b(response.body, digest_size=16).hexdigest())
+
+        headers = _validator_headers(etag, last_modified)
+        if _not_modified(request, etag, last_modified):
+            headers.update((k, v) for k, v in response.headers.items()
+                           if k.lower() != 'content-length')
+            return HTTPResponse(status=304, headers=headers,
+                                content_type=response.content_type)
+
+        response.headers.update(headers)
+        return response
+
+    return decorated_filter
+
+
+def _forwarded_for(request, proxies):
+    # The address seen by the outermost of `proxies` trusted proxies: the
+    # addresses on the left of X-Forwarded-For are set by the client
+    addresses = [a.strip() for a in
+                 request.headers.get('X-Forwarded-For', '').split(',')
+                 if a.strip()]
+    if not addresses:
+        return request.ip
+
+    return addresses[-min(proxies, len(addresses))]
+
+
+def _client_key(key):
+    # Returns a function giving the client part of a rate limit key
+    if callable(key):
+        return key
+    if key == 'ip':
+        return lambda request: request.ip
+    if key == 'forwarded' or key.startswith('forwarded:'):
+        proxies = int(key[10:] or 1)
+        return lambda request: _forwarded_for(request, proxies)
+    if key.startswith('header:'):
+        name = key[7:]
+        return lambda request: request.headers.get(name)
+    if key.startswith('param:'):
+        name = key[6:]
+        return lambda request: request.args.get(name)
+
+    raise RuntimeError('Unknown rate limit key: {}'.format(key))
+
+
+def filter_rate_limit(get_response, params):
+    """
+    This filter limits the request rate of each client of a resource with
+    token buckets. It is enabled by the ``rate_limit`` resource parameter,
+    set to the number of requests per second or to a dict of options:
+
+    - ``limit``: Number of requests allowed by ``period`` (required)
+    - ``period``: Length of the period, in seconds (default: 1)
+    - ``burst``: Number of requests allowed at once (default: ``limit``)
+    - ``key``: What identifies a client: ``ip`` (default), ``forwarded``
+      (the last address of the ``X-Forwarded-For`` header, set by a
+      trusted proxy), ``forwarded:<n>`` (the address ``n`` entries from
+      the right of the header, behind ``n`` trusted proxies),
+      ``header:<name>``, ``param:<name>`` (a query string parameter) or a
+      function taking the request. Requests with no key value are not
+      limited.
+    - ``backend``: A :class:`rafter.ratelimit.BaseBuckets` instance
+      (default: a :class:`rafter.ratelimit.MemoryBuckets` for the
+      resource). Use a :class:`rafter.ratelimit.SharedMemoryBuckets` to
+      share the limits between workers.
+
+    Buckets are per route and per client. Requests over the limit are
+    rejected with a 429 :class:`rafter.exceptions.ApiError` and a
+    ``Retry-After`` header. The filter is the outermost of the default
+    filters: rejected requests cost a single bucket check.
+
+    .. code-block:: python
+
+        @app.resource('/search', rate_limit={'limit': 100, 'period': 60,
+                                             'key': 'header:X-Api-Key'})
+        async def search(request):
+            return await run_search(request.args.get('q'))
+    """
+    options = params.get('rate_limit')
+    if not options:
+        return get_response
+    if not isinstance(options, dict):
+        options = {'limit': options}
+
+    rate = options['limit'] / options.get('period', 1)
+    burst = options.get('burst', options['limit'])
+    client_key = _client_key(options.get('key', 'ip'))
+    backend = options.get('backend')
+    if backend is None:
+        backend = MemoryBuckets()
+    prefix = '{} '.format(params.get('uri', ''))
+
+    async def decorated_filter(request, *args, **kwargs):
+        client = client_key(request)
+        if client is not None:
+            wait = backend.consume(prefix + str(client), rate, burst)
+            if wait:
+                raise ApiError('Too many requests', 429,
+                               headers={'Retry-After': str(ceil(wait))})
+
+        return await get_response(request, *args, **kwargs)
+
+    return decorated_filter
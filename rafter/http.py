@@ -2,13 +2,39 @@
 """
 .. autoclass:: rafter.http.Request
 
+    .. automethod:: iter_json
+    .. automethod:: loader
+
 .. autoclass:: rafter.http.Response
+
+    .. automethod:: serialize_in_executor
+    .. autoattribute:: expected_size
+
+.. autoclass:: rafter.http.StreamingResponse
+
+    .. automethod:: add_transform
 """
 
+import asyncio
+
 from sanic.request import Request as BaseRequest
-from sanic.response import HTTPResponse, json_dumps
+from sanic.response import HTTPResponse, StreamingHTTPResponse
+
+from rafter import exceptions
+from rafter.loader import DataLoader
+from rafter.serializers import JSONSerializer
+from rafter.streams import JSONStreamParser
 
-__all__ = ('Response',)
+__all__ = ('Response', 'StreamingResponse')
+
+default_serializer = JSONSerializer()
+
+
+def _list_size(data, serializer):
+    # The size of the first item of a list times its number of items
+    if not isinstance(data, (list, tuple)) or not data:
+        return 0
+    return len(serializer.dumps(data[0])) * len(data)
 
 
 class Request(BaseRequest):
@@ -22,12 +48,80 @@ class Request(BaseRequest):
 
             This property can contain the request data after validation
             and conversion by the filter.
+
+    .. py:attribute:: projection
+
+            The :class:`rafter.projection.Projection` of the fields
+            selected by the client, set by
+            :func:`rafter.filters.filter_projection`, or ``None``.
     """
 
+    ndjson_types = ('application/x-ndjson', 'application/ndjson',
+                    'application/jsonlines', 'application/x-jsonlines')
+
     def __init__(self, *args, **kwargs):
         super(Request, self).__init__(*args, **kwargs)
 
         self.validated = {}
+        self.projection = None
+        self._loaders = None
+
+    def loader(self, batch_fn, **kwargs):
+        """
+        Returns the :class:`rafter.loader.DataLoader` of ``batch_fn`` for
+        this request, created on first call with the ``kwargs`` options.
+        Values loaded by a loader are kept until the end of the request.
+        """
+        if self._loaders is None:
+            self._loaders = {}
+
+        loader = self._loaders.get(batch_fn)
+        if loader is None:
+            loader = self._loaders[batch_fn] = DataLoader(batch_fn, **kwargs)
+        return loader
+
+    async def iter_json(self, format=None, max_item_size=1048576):
+        """
+        Asynchronously iterates over the items of a JSON array or of a
+        newline delimited JSON body, parsing them as they arrive on a
+        streaming resource (``stream=True``). On other resources, the
+        already received body is parsed.
+
+        :param format: ``json`` or ``ndjson``. By default, ``ndjson`` is
+                       used when the request's content type is one of
+                       :attr:`ndjson_types`.
+        :param max_item_size: The maximum size of an item, in characters
+                              (see :class:`rafter.streams.JSONStreamParser`)
+
+        Raises a :class:`rafter.exceptions.ApiError` with a 400 status when
+        the body is not valid.
+        """
+        if format is None:
+            content_type = self.content_type.split(';')[0].strip().lower()
+            format = 'ndjson' if content_type in self.ndjson_types \
+                else 'json'
+
+        parser = JSONStreamParser(format, max_item_size)
+        stream = getattr(self, 'stream', None)
+
+        try:
+            if stream is None:
+                items = parser.feed(self.body or b'')
+                for item in items:
+                    yield item
+            else:
+                while True:
+                    chunk = await stream.get()
+                    if chunk is None:
+                        break
+
+                    for item in parser.feed(chunk):
+                        yield item
+
+            for item in parser.close():
+                yield item
+        except ValueError as e:
+            raise exceptions.ApiError('Invalid JSON body: {}'.format(e), 400)
 
 
 class Response(HTTPResponse):
@@ -35,8 +129,10 @@ class Response(HTTPResponse):
     A response object that you can return in any route. It looks a lot like
     ``sanic.response.json`` function except that instead of immediately
     serialize the data, it just keeps the value.
-    Serialization (to JSON) will only happen when the response's body
-    is retrieved.
+    Serialization (to JSON by default) will only happen when the response's
+    body is retrieved. The serialized body is then kept until ``body`` or
+    ``data`` is set again, so reading it several times costs a single
+    encoding.
 
     Example:
 
@@ -49,12 +145,21 @@ class Response(HTTPResponse):
     """
 
     def __init__(self, body=None, status=200, headers=None,
-                 content_type='application/json'):
+                 content_type=None, serializer=None, size_hint=None):
         """
         :param body: The data this will be serialized in response.
         :param status: The response status code.
         :param headers: Additionnal headers.
-        :param content_type: Response MIME Type
+        :param content_type: Response MIME Type. Defaults to the
+                             serializer's content type.
+        :param serializer: A :class:`rafter.serializers.Serializer`
+                           instance. When neither ``serializer`` nor
+                           ``content_type`` is set, the serializer is
+                           negotiated from the request's ``Accept`` header
+                           by :func:`rafter.filters.filter_transform_response`
+                           (JSON by default).
+        :param size_hint: The expected size of the body, in bytes
+                          (see :attr:`expected_size`).
 
         .. important::
             Input ``body`` will later be serialized. Its value is held by
@@ -63,20 +168,226 @@ class Response(HTTPResponse):
             getting ``body`` will return the serialized value. This is the
             only way we can force Sanic HTTPResponse to serialize our response
             as late as possible.
+
+            The serialized value is cached. If you change ``data`` in place
+            after the body has been read, set it again to drop the cache.
         """
+        self._serializer = serializer
+        self.size_hint = size_hint
         super(Response, self).__init__(body=None, status=status,
                                        headers=headers,
                                        content_type=content_type)
-        self._data = body
+        self.data = body
 
     @property
     def body(self):
-        return self._encode_body(json_dumps(self._data))
+        if self._body is None:
+            serializer = self._serializer or default_serializer
+            self._body = serializer.dumps(self._data)
+        return self._body
 
     @body.setter
     def body(self, data):
-        self._data = data
+        self.data = data
 
     @property
     def data(self):
         return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._body = None
+
+    @property
+    def serializer(self):
+        """
+        The serializer of this response, ``None`` if not chosen yet.
+        Setting it drops the cached body.
+        """
+        return self._serializer
+
+    @serializer.setter
+    def serializer(self, serializer):
+        self._serializer = serializer
+        self._body = None
+
+    @property
+    def content_type(self):
+        if self._content_type is not None:
+            return self._content_type
+        return (self._serializer or default_serializer).content_type
+
+    @content_type.setter
+    def content_type(self, content_type):
+        self._content_type = content_type
+
+    @property
+    def is_negotiable(self):
+        """
+        ``True`` when neither a serializer nor a content type were given.
+        """
+        return self._serializer is None and self._content_type is None
+
+    @property
+    def content_length(self):
+        """
+        The length, in bytes, of the serialized body.
+        """
+        return len(self.body)
+
+    async def serialize_in_executor(self, executor=None):
+        """
+        Serializes the data in ``executor`` (the loop's default executor if
+        ``None``) and caches the body. Returns the body.
+
+        With a ``ProcessPoolExecutor``, the data and the serializer must be
+        picklable.
+        """
+        if self._body is None:
+            serializer = self._serializer or default_serializer
+            self._body = await asyncio.get_event_loop().run_in_executor(
+                executor, serializer.dumps, self._data)
+        return self._body
+
+    @property
+    def expected_size(self):
+        """
+        The expected size of the body, in bytes, without serializing it:
+        the body's size once serialized, or else ``size_hint``, or else the
+        size of the first item of a list times its number of items. For a
+        dict, like ``{"items": [...], "next": ...}``, it is the sum of the
+        estimates of its list values. Other data give ``0``.
+        """
+        if self._body is not None:
+            return len(self._body)
+        if self.size_hint is not None:
+            return self.size_hint
+
+        serializer = self._serializer or default_serializer
+        data = self._data
+        if isinstance(data, dict):
+            return sum(_list_size(v, serializer) for v in data.values())
+        return _list_size(data, serializer)
+
+    @property
+    def is_serialized(self):
+        """
+        ``True`` when the body has already been serialized and cached.
+        """
+        return self._body is not None
+
+
+class StreamingResponse(StreamingHTTPResponse):
+    """
+    A response streaming a sequence of items as a JSON array or as
+    newline delimited JSON (NDJSON), using chunked transfer encoding.
+    Items are serialized one by one, so the whole collection never has to
+    be held in memory.
+
+    Items are buffered up to ``chunk_size`` bytes before being written.
+    When the transport's write buffer is above ``high_water`` bytes, the
+    stream waits for the client to read data before getting more items.
+
+    Example:
+
+    .. code-block:: python
+
+        @app.resource('/export')
+        async def export(request):
+            async def rows():
+                async for row in db.fetch_all():
+                    yield row
+
+            return StreamingResponse(rows(), format='ndjson')
+    """
+
+    chunk_size = 16384
+    high_water = 65536
+    drain_delay = 0.001
+
+    content_types = {
+        'json': 'application/json',
+        'ndjson': 'application/x-ndjson'
+    }
+
+    def __init__(self, items, status=200, headers=None, content_type=None,
+                 format='json', serializer=None):
+        """
+        :param items: An iterable or an asynchronous iterable of items.
+        :param status: The response status code.
+        :param headers: Additionnal headers.
+        :param content_type: Response MIME Type. Defaults to the format's
+                             content type.
+        :param format: ``json`` (a JSON array) or ``ndjson`` (one JSON
+                       document per line).
+        :param serializer: The items serializer. Defaults to the JSON
+                           serializer.
+        """
+        if format not in self.content_types:
+            raise ValueError('Unknown stream format: {}'.format(format))
+
+        super(StreamingResponse, self).__init__(
+            self._stream, status=status, headers=headers,
+            content_type=content_type or self.content_types[format])
+
+        self.data = items
+        self.format = format
+        self.serializer = serializer or default_serializer
+        self.transforms = []
+
+    def add_transform(self, func):
+        """
+        Adds a function called on every item before its serialization.
+        It receives the item and returns the (new) item. Transforms are
+        called in the order they were added.
+        """
+        self.transforms.append(func)
+
+    async def _iter_items(self):
+        if hasattr(self.data, '__aiter__'):
+            async for item in self.data:
+                yield item
+        else:
+            for item in self.data:
+                yield item
+
+    async def _drain(self):
+        transport = self.transport
+        while transport.get_write_buffer_size() > self.high_water:
+            if transport.is_closing():
+                return False
+            await asyncio.sleep(self.drain_delay)
+
+        return not transport.is_closing()
+
+    async def _stream(self, response):
+        dumps = self.serializer.dumps
+        transforms = self.transforms
+        ndjson = self.format == 'ndjson'
+
+        buffer = bytearray() if ndjson else bytearray(b'[')
+        first = True
+        async for item in self._iter_items():
+            for transform in transforms:
+                item = transform(item)
+
+            if ndjson:
+                buffer += dumps(item)
+                buffer += b'\n'
+            else:
+                if not first:
+                    buffer += b','
+                first = False
+                buffer += dumps(item)
+
+            if len(buffer) >= self.chunk_size:
+                self.write(bytes(buffer))
+                buffer.clear()
+                if not await self._drain():
+                    return
+
+        if not ndjson:
+            buffer += b']'
+        if buffer:
+            self.write(bytes(buffer))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: DataLoader
+
+    .. automethod:: load
+    .. automethod:: load_many
+    .. automethod:: prime
+    .. automethod:: clear
+"""
+
+import asyncio
+
+__all__ = ('DataLoader',)
+
+
+class DataLoader(object):
+    """
+    Batches and memoizes the loading of entities by key. All the keys
+    requested by :meth:`load` during the same event loop iteration are
+    passed to a single call of ``batch_fn``, and every key is loaded only
+    once by a loader.
+
+    ``batch_fn`` is a coroutine function taking a list of keys and
+    returning a list of values in the same order. A value can be an
+    exception instance, raised by the :meth:`load` of its key. When
+    ``batch_fn`` raises, every key of the batch fails and is forgotten.
+
+    A loader lives as long as the request it is created for, with
+    :meth:`rafter.http.Request.loader`:
+
+    .. code-block:: python
+
+        async def load_users(ids):
+            rows = await db.fetch_users(ids)
+            by_id = dict((row['id'], row) for row in rows)
+            return [by_id.get(i) for i in ids]
+
+        @app.resource('/posts')
+        async def posts(request):
+            users = request.loader(load_users)
+            posts = await db.fetch_posts()
+            authors = await users.load_many([p['author'] for p in posts])
+            ...
+
+    :param batch_fn: The batch loading coroutine function
+    :param max_batch_size: The maximum number of keys of a batch (optional)
+    :param loop: The event loop (default: the current one)
+    """
+
+    def __init__(self, batch_fn, max_batch_size=None, loop=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.loop = loop or asyncio.get_event_loop()
+        self._futures = {}
+        self._queue = []
+
+    def load(self, key):
+        """
+        Returns a future of the value of ``key``. Cancelling it doesn't
+        cancel the loading of the value.
+        """
+        future = self._futures.get(key)
+        if future is None:
+            future = self._futures[key] = self.loop.create_future()
+            if not self._queue:
+                self.loop.call_soon(self._dispatch)
+            self._queue.append((key, future))
+
+        return asyncio.shield(future)
+
+    def load_many(self, keys):
+        """
+        Returns a future of the list of values of ``keys``.
+        """
+        return asyncio.gather(*(self.load(key) for key in keys))
+
+    def prime(self, key, value):
+        """
+        Sets the value of ``key``, unless it is already loaded or loading.
+        """
+        if key not in self._futures:
+            future = self._futures[key] = self.loop.create_future()
+            future.set_result(value)
+
+    def clear(self, key=None):
+        """
+        Forgets the value of ``key``, or all of them.
+        """
+        if key is None:
+            self._futures.clear()
+        else:
+            self._futures.pop(key, None)
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, []
+        size = self.max_batch_size or len(queue)
+        for i in range(0, len(queue), size):
+            self.loop.create_task(self._run_batch(queue[i:i + size]))
+
+    async def _run_batch(self, batch):
+        keys = [key for key, _ in batch]
+        try:
+            values = await self.batch_fn(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    'Batch function returned {} values for {} keys'.format(
+                        len(values), len(keys)))
+        except Exception as e:
+            for key, future in batch:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+                future.set_exception(e)
+            return
+
+        for (key, future), value in zip(batch, values):
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: Metrics
+
+    .. automethod:: instrument
+    .. automethod:: snapshot
+    .. automethod:: start
+    .. automethod:: flush
+    .. automethod:: render
+
+.. autoclass:: Histogram
+
+    .. automethod:: observe
+"""
+
+from bisect import bisect_left
+from functools import update_wrapper, wraps
+import json
+import os
+import tempfile
+import time
+
+__all__ = ('Metrics', 'Histogram')
+
+# Nanoseconds (perf_counter_ns is only available on Python 3.7+)
+_clock = getattr(time, 'perf_counter_ns', None) or \
+    (lambda: int(time.perf_counter() * 1e9))
+
+
+class Histogram(object):
+    """
+    A cumulative histogram, as exposed by Prometheus.
+
+    :param buckets: The sorted upper bounds of the buckets
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Records a value.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_primitive(self):
+        return {'counts': list(self.counts), 'sum': self.sum,
+                'count': self.count}
+
+
+class _RouteMetrics(object):
+    __slots__ = ('requests', 'statuses', 'filters', 'handler',
+                 'serialization', 'response_size')
+
+    def __init__(self, time_buckets, size_buckets):
+        self.requests = 0
+        self.statuses = {}
+        self.filters = Histogram(time_buckets)
+        self.handler = Histogram(time_buckets)
+        self.serialization = Histogram(time_buckets)
+        self.response_size = Histogram(size_buckets)
+
+
+class Metrics(object):
+    """
+    Per route request metrics. When an app is created with
+    ``Rafter(metrics=True)`` (or a ``Metrics`` instance), every resource
+    records:
+
+    - its number of requests and responses by status class (``2xx``...)
+    - the time spent in its filters, in the resource itself and in the
+      response body serialization (in seconds)
+    - the size of its response bodies (in bytes)
+
+    Counters are plain attributes updated by the worker's event loop,
+    without any lock. Each worker has its own counters. When a
+    ``directory`` is set, every worker writes a snapshot of its counters
+    there every ``flush_interval`` seconds, and :meth:`render` adds up the
+    snapshots of all the workers.
+
+    Expose the metrics in the Prometheus text format with
+    :meth:`rafter.app.Rafter.add_metrics_resource`.
+
+    :param time_buckets: Upper bounds of the time histogram buckets
+    :param size_buckets: Upper bounds of the body size histogram buckets
+    :param directory: A directory shared by the workers (optional)
+    :param flush_interval: Seconds between two snapshots of a worker
+    :param prefix: Prefix of the metric names
+    """
+
+    default_time_buckets = (.0005, .001, .0025, .005, .01, .025, .05, .1,
+                            .25, .5, 1, 2.5, 5, 10)
+    default_size_buckets = (128, 512, 1024, 4096, 16384, 65536, 262144,
+                            1048576, 4194304)
+
+    def __init__(self, time_buckets=None, size_buckets=None,
+                 directory=None, flush_interval=5, prefix='rafter'):
+        self.time_buckets = tuple(time_buckets or self.default_time_buckets)
+        self.size_buckets = tuple(size_buckets or self.default_size_buckets)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+        self.routes = {}
+
+        # Histograms count nanoseconds, bounds are converted once.
+        self._time_bounds = tuple(int(b * 1e9) for b in self.time_buckets)
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def instrument(self, handler, init_filters, name):
+        """
+        Returns the resource ``handler`` wrapped by its filters
+        (``init_filters`` is the filter decorator) and by the timers of the
+        route ``name``.
+        """
+        route = self.routes.get(name)
+        if route is None:
+            route = self.routes[name] = _RouteMetrics(self._time_bounds,
+                                                      self.size_buckets)
+
+        @wraps(handler)
+        async def timed_handler(request, *args, **kwargs):
+            start = _clock()
+            try:
+                return await handler(request, *args, **kwargs)
+            finally:
+                request._handler_time = _clock() - start
+
+        get_response = init_filters(timed_handler)
+
+        async def instrumented(request, *args, **kwargs):
+            request._handler_time = 0
+            start = _clock()
+            route.requests += 1
+            try:
+                response = await get_response(request, *args, **kwargs)
+            except Exception as e:
+                _count_status(route, getattr(e, 'status_code', 500))
+                raise
+
+            end = _clock()
+            handler_time = request._handler_time
+            route.handler.observe(handler_time)
+            route.filters.observe(end - start - handler_time)
+            _count_status(route, response.status)
+
+            body = getattr(response, 'body', None)
+            if body is not None:
+                route.serialization.observe(_clock() - end)
+                route.response_size.observe(len(body))
+
+            return response
+
+        return update_wrapper(instrumented, get_response)
+
+    def snapshot(self):
+        """
+        Returns the worker's metrics as a dict of primitive values.
+        """
+        return dict((name, {
+            'requests': route.requests,
+            'statuses': dict(route.statuses),
+            'filters': route.filters.to_primitive(),
+            'handler': route.handler.to_primitive(),
+            'serialization': route.serialization.to_primitive(),
+            'response_size': route.response_size.to_primitive()
+        }) for name, route in self.routes.items())
+
+    def start(self, loop):
+        """
+        Writes a snapshot every ``flush_interval`` seconds, when a
+        ``directory`` is set. It is called when a worker starts.
+        """
+        if self.directory is None:
+            return
+
+        def flush():
+            try:
+                self.flush()
+            finally:
+                loop.call_later(self.flush_interval, flush)
+
+        loop.call_later(self.flush_interval, flush)
+
+    def flush(self):
+        """
+        Writes the worker's snapshot in ``directory``.
+        """
+        if self.directory is None:
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(self.snapshot(), fp)
+        os.replace(tmp, os.path.join(self.directory,
+                                     '{}.json'.format(os.getpid())))
+
+    def _snapshots(self):
+        if self.directory is None:
+            return [self.snapshot()]
+
+        self.flush()
+        snapshots = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path) as fp:
+                    snapshots.append(json.load(fp))
+            except (OSError, ValueError):
+                pass
+
+        return snapshots
+
+    def render(self):
+        """
+        Returns the metrics of all the routes (and all the workers when a
+        ``directory`` is set) in the Prometheus text exposition format.
+        """
+        routes = {}
+        for snapshot in self._snapshots():
+            for name, data in snapshot.items():
+                total = routes.get(name)
+                if total is None:
+                    routes[name] = data
+                else:
+                    _merge(total, data)
+
+        p = self.prefix
+        lines = [
+            '# TYPE {}_requests_total counter'.format(p),
+            '# TYPE {}_responses_total counter'.format(p)
+        ]
+        for name, data in sorted(routes.items()):
+            lines.append('{}_requests_total{{route="{}"}} {}'.format(
+                p, _label(name), data['requests']))
+            for status, count in sorted(data['statuses'].items()):
+                lines.append(
+                    '{}_responses_total{{route="{}",status="{}"}} {}'.format(
+                        p, _label(name), status, count))
+
+        for key in ('filters', 'handler', 'serialization'):
+            metric = '{}_{}_seconds'.format(p, key)
+            lines.append('# TYPE {} histogram'.format(metric))
+            for name, data in sorted(routes.items()):
+                lines.extend(_histogram(metric, name, data[key],
+                                        self.time_buckets, 1e-9))
+
+        metric = '{}_response_size_bytes'.format(p)
+        lines.append('# TYPE {} histogram'.format(metric))
+        for name, data in sorted(routes.items()):
+            lines.extend(_histogram(metric, name, data['response_size'],
+                                    self.size_buckets, 1))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _count_status(route, status):
+    status = '{}xx'.format(status // 100)
+    route.statuses[status] = route.statuses.get(status, 0) + 1
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _merge(total, data):
+    total['requests'] += data['requests']
+    for status, count in data['statuses'].items():
+        total['statuses'][status] = total['statuses'].get(status, 0) + count
+
+    for key in ('filters', 'handler', 'serialization', 'response_size'):
+        h, other = total[key], data[key]
+        h['counts'] = [a + b for a, b in zip(h['counts'], other['counts'])]
+        h['sum'] += other['sum']
+        h['count'] += other['count']
+
+
+def _histogram(metric, name, data, bounds, scale):
+    label = _label(name)
+    lines = []
+    cumulative = 0
+    for le, count in zip(bounds, data['counts']):
+        cumulative += count
+        lines.append('{}_bucket{{route="{}",le="{}"}} {}'.format(
+            metric, label, le, cumulative))
+
+    lines.append('{}_bucket{{route="{}",le="+Inf"}} {}'.format(
+        metric, label, data['count']))
+    lines.append('{}_sum{{route="{}"}} {}'.format(
+        metric, label, data['sum'] * scale))
+    lines.append('{}_count{{route="{}"}} {}'.format(
+        metric, label, data['count']))
+
+    return lines
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: Paginator
+
+    .. automethod:: paginate
+    .. automethod:: iter_items
+    .. automethod:: get_window
+    .. automethod:: next_url
+    .. automethod:: encode_cursor
+    .. automethod:: decode_cursor
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Mapping
+import hashlib
+import hmac
+import json
+from urllib.parse import urlencode
+
+from rafter.exceptions import ApiError
+from rafter.http import Response
+
+__all__ = ('Paginator',)
+
+
+def _b64encode(data):
+    return urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _key_getter(key):
+    # Returns a function giving the key values of an item, as a tuple
+    if callable(key):
+        return lambda item: tuple(key(item))
+    if isinstance(key, str):
+        key = (key,)
+
+    def get(item):
+        if isinstance(item, Mapping):
+            return tuple(item[k] for k in key)
+        return tuple(getattr(item, k) for k in key)
+
+    return get
+
+
+class Paginator(object):
+    """
+    Keyset pagination with opaque cursors. A page is the ``limit`` items
+    following the item a cursor points to, in the order of their ``key``:
+    the cost of a page doesn't depend on its position in the collection.
+
+    Cursors hold the key values of the last item of a page, signed with
+    ``secret`` (HMAC-SHA256), so clients can't forge them. Key values must
+    be JSON serializable.
+
+    The page fetcher is a coroutine function taking the key values (a
+    tuple) of the item to start after, or ``None`` for the first page, and
+    a number of items. It returns a list of at most that number of items:
+
+    .. code-block:: python
+
+        paginator = Paginator(SECRET_KEY, key=('created', 'id'))
+
+        async def fetch_posts(after, limit):
+            if after is None:
+                return await db.fetch(
+                    'SELECT * FROM posts ORDER BY created, id LIMIT $1',
+                    limit)
+            return await db.fetch(
+                'SELECT * FROM posts WHERE (created, id) > ($1, $2) '
+                'ORDER BY created, id LIMIT $3', *after, limit)
+
+        @app.resource('/posts')
+        async def posts(request):
+            return await paginator.paginate(request, fetch_posts)
+
+    The ``limit`` and ``cursor`` query string parameters are read from
+    ``request.validated['params']`` when a request schema validated them
+    (see :class:`rafter.contrib.schematics.helpers.PageParams`), or else
+    from the query string.
+
+    :param secret: The signing key (bytes or string)
+    :param key: The name of the key field, a tuple of names or a function
+                returning the key values of an item
+    :param default_limit: The number of items of a page
+    :param max_limit: The maximum number of items of a page
+    :param links: Where the link to the next page goes: ``header`` (a
+                  ``Link`` header) or ``body`` (the body is then an object
+                  with ``items`` and ``next`` keys)
+    :param limit_param: The name of the limit parameter
+    :param cursor_param: The name of the cursor parameter
+    """
+
+    def __init__(self, secret, key='id', default_limit=20, max_limit=100,
+                 links='header', limit_param='limit', cursor_param='cursor'):
+        if links not in ('header', 'body'):
+            raise RuntimeError('Unknown pagination links: {}'.format(links))
+
+        self.secret = secret.encode('utf-8') if isinstance(secret, str) \
+            else secret
+        self.get_key = _key_getter(key)
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.links = links
+        self.limit_param = limit_param
+        self.cursor_param = cursor_param
+
+    def _sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:16]
+
+    def encode_cursor(self, values):
+        """
+        Returns the signed cursor of the key values ``values``.
+        """
+        payload = json.dumps(list(values), separators=(',', ':')).encode()
+        return '{}.{}'.format(_b64encode(payload),
+                              _b64encode(self._sign(payload)))
+
+    def decode_cursor(self, cursor):
+        """
+        Returns the key values (a tuple) of a cursor. Raises a 400
+        :class:`rafter.exceptions.ApiError` when the cursor is not valid.
+        """
+        try:
+            payload, signature = cursor.split('.')
+            payload = _b64decode(payload)
+            valid = hmac.compare_digest(_b64decode(signature),
+                                        self._sign(payload))
+            if valid:
+                values = json.loads(payload.decode('utf-8'))
+                if isinstance(values, list):
+                    return tuple(values)
+        except ValueError:
+            pass
+
+        raise ApiError('Invalid cursor', 400, param=self.cursor_param)
+
+    def get_window(self, request):
+        """
+        Returns the key values to start after (or ``None``) and the
+        number of items of the requested page.
+        """
+        params = request.validated.get('params') or {}
+        if self.limit_param in params or self.cursor_param in params:
+            limit = params.get(self.limit_param)
+            cursor = params.get(self.cursor_param)
+        else:
+            limit = request.args.get(self.limit_param)
+            cursor = request.args.get(self.cursor_param)
+
+        if limit is None:
+            limit = self.default_limit
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if not 1 <= limit <= self.max_limit:
+                raise ApiError('Invalid limit', 400, param=self.limit_param,
+                               max_limit=self.max_limit)
+
+        after = self.decode_cursor(cursor) if cursor else None
+        return after, limit
+
+    def next_url(self, request, cursor):
+        """
+        Returns the URL of the request with another cursor.
+        """
+        query = [(k, v) for k, values in request.args.items()
+                 if k != self.cursor_param for v in values]
+        query.append((self.cursor_param, cursor))
+        return '{}?{}'.format(request.path, urlencode(query))
+
+    async def paginate(self, request, fetch):
+        """
+        Fetches the requested page and returns a
+        :class:`rafter.http.Response` with its items and a link to the next
+        page, if any. Only the items of the page are loaded.
+        """
+        after, limit = self.get_window(request)
+
+        # One more item tells whether there is a next page
+        items = list(await fetch(after, limit + 1))
+        url = None
+        if len(items) > limit:
+            del items[limit:]
+            url = self.next_url(request,
+                                self.encode_cursor(self.get_key(items[-1])))
+
+        if self.links == 'body':
+            return Response({'items': items, 'next': url})
+
+        headers = {}
+        if url is not None:
+            headers['Link'] = '<{}>; rel="next"'.format(url)
+        return Response(items, headers=headers)
+
+    async def iter_items(self, fetch, after=None, page_size=None):
+        """
+        Asynchronously iterates over the items of all the pages following
+        the key values ``after``, fetching ``page_size`` items at a time.
+        Only one page is held in memory, to stream a whole collection with
+        a :class:`rafter.http.StreamingResponse`:
+
+        .. code-block:: python
+
+            @app.resource('/posts/export')
+            async def export(request):
+                return StreamingResponse(paginator.iter_items(fetch_posts))
+        """
+        page_size = page_size or self.max_limit
+        while True:
+            items = await fetch(after, page_size)
+            for item in items:
+                yield item
+
+            if len(items) < page_size:
+                return
+            after = self.get_key(items[-1])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: FilterProfiler
+
+    .. automethod:: wrap
+    .. automethod:: finish
+"""
+
+from functools import update_wrapper
+import logging
+import time
+
+__all__ = ('FilterProfiler',)
+
+log = logging.getLogger(__name__)
+
+# Nanoseconds (perf_counter_ns is only available on Python 3.7+)
+_clock = getattr(time, 'perf_counter_ns', None) or \
+    (lambda: int(time.perf_counter() * 1e9))
+
+
+class FilterProfiler(object):
+    """
+    Times every layer of a resource's filter chain: the resource itself,
+    each function filter and each group of pipeline filters. It is created
+    by :meth:`rafter.app.Rafter.init_filters` when the ``profile`` resource
+    parameter is set.
+
+    For every request returning a response, each layer that ran gets a
+    tuple of its name, its total time and its self time (the total time
+    minus the time of the next layer), in nanoseconds. The list starts with
+    the outermost layer. It is reported according to the ``profile``
+    parameter:
+
+    - ``True``: a log record of the ``rafter.profiling`` logger
+    - a callable: called with the request and the list
+    - a dict of options: ``callback`` (a callable), ``log`` (a boolean),
+      ``level`` (the log level, default: ``INFO``) and ``header`` (a
+      boolean, adds a ``Server-Timing`` header with the self time of each
+      layer)
+
+    Example:
+
+    .. code-block:: python
+
+        @app.resource('/', profile={'log': True, 'header': True})
+        async def main_route(request):
+            return {}
+
+    :param option: The ``profile`` resource parameter
+    """
+
+    def __init__(self, option):
+        if option is True:
+            option = {'log': True}
+        elif callable(option):
+            option = {'callback': option}
+
+        self.callback = option.get('callback')
+        self.log = option.get('log', False)
+        self.level = option.get('level', logging.INFO)
+        self.header = option.get('header', False)
+        self.names = []
+
+    def wrap(self, get_response, name):
+        """
+        Returns ``get_response`` wrapped by a timer. Layers must be wrapped
+        from the innermost to the outermost one.
+        """
+        index = len(self.names)
+        self.names.append(name)
+
+        async def timed(request, *args, **kwargs):
+            start = _clock()
+            try:
+                return await get_response(request, *args, **kwargs)
+            finally:
+                request._filter_times[index] = _clock() - start
+
+        return timed
+
+    def finish(self, get_response, handler):
+        """
+        Returns the outermost wrapper of the chain, reporting the timings
+        of every request. It takes the attributes of ``handler``.
+        """
+        size = len(self.names)
+
+        async def profiled(request, *args, **kwargs):
+            request._filter_times = [None] * size
+            response = await get_response(request, *args, **kwargs)
+            self.report(request, response, self.timings(request))
+            return response
+
+        return update_wrapper(profiled, handler)
+
+    def timings(self, request):
+        result = []
+        downstream = 0
+        for name, total in zip(self.names, request._filter_times):
+            if total is None:  # Skipped by a filter returning early
+                continue
+            result.append((name, total, total - downstream))
+            downstream = total
+
+        result.reverse()
+        return result
+
+    def report(self, request, response, timings):
+        if self.callback is not None:
+            self.callback(request, timings)
+
+        if self.log:
+            log.log(self.level, '%s %s: %s', request.method, request.path,
+                    ', '.join('{} {:.3f}ms ({:.3f}ms total)'.format(
+                        name, own / 1e6, total / 1e6)
+                        for name, total, own in timings),
+                    extra={'filter_timings': timings})
+
+        if self.header and hasattr(response, 'headers'):
+            value = ', '.join('{};dur={:.3f}'.format(name, own / 1e6)
+                              for name, total, own in timings)
+            current = response.headers.get('Server-Timing')
+            response.headers['Server-Timing'] = \
+                '{}, {}'.format(current, value) if current else value
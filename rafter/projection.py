@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Field selections used by :func:`rafter.filters.filter_projection`.
+
+.. autofunction:: compile_projection
+
+.. autoclass:: Projection
+
+    .. automethod:: apply
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import re
+
+__all__ = ('compile_projection', 'Projection')
+
+_tokens = re.compile(r'\s*([^,().\s]+|[,().])')
+_projections = OrderedDict()
+_max_projections = 256
+_max_depth = 8
+
+
+class Projection(object):
+    """
+    A compiled field selection. Its ``tree`` is a dict of the selected
+    names, holding ``None`` for a whole value or the dict of the selected
+    names of a nested object.
+
+    :param tree: The selection tree
+    """
+
+    __slots__ = ('tree',)
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def apply(self, data):
+        """
+        Returns a copy of ``data`` holding the selected fields only. Lists
+        are projected item by item. Selected names missing from the data
+        are ignored, other values are returned as is.
+        """
+        return _project(data, self.tree)
+
+
+def _project(data, tree):
+    if isinstance(data, Mapping):
+        result = {}
+        for name, sub in tree.items():
+            if name in data:
+                value = data[name]
+                result[name] = value if sub is None else _project(value, sub)
+        return result
+
+    if isinstance(data, (list, tuple)):
+        return [_project(item, tree) for item in data]
+
+    return data
+
+
+def _merge(tree, name, sub):
+    if name not in tree:
+        tree[name] = sub
+        return
+
+    current = tree[name]
+    if current is None or sub is None:
+        tree[name] = None
+        return
+
+    for k, v in sub.items():
+        _merge(current, k, v)
+
+
+def _parse(tokens, pos, depth):
+    # list := item (',' item)*
+    # item := name ('.' name)* ['(' list ')']
+    tree = {}
+    while True:
+        path = []
+        while True:
+            if pos >= len(tokens) or tokens[pos] in ',().':
+                raise ValueError('Expected a field name')
+            path.append(tokens[pos])
+            pos += 1
+            if pos < len(tokens) and tokens[pos] == '.':
+                pos += 1
+            else:
+                break
+
+        left = depth - len(path) + 1
+        if left < 0:
+            raise ValueError('Field selection is too deep')
+
+        sub = None
+        if pos < len(tokens) and tokens[pos] == '(':
+            if left == 0:
+                raise ValueError('Field selection is too deep')
+            sub, pos = _parse(tokens, pos + 1, left - 1)
+            if pos >= len(tokens) or tokens[pos] != ')':
+                raise ValueError('Expected ")"')
+            pos += 1
+
+        for name in reversed(path[1:]):
+            sub = {name: sub}
+        _merge(tree, path[0], sub)
+
+        if pos < len(tokens) and tokens[pos] == ',':
+            pos += 1
+        else:
+            return tree, pos
+
+
+def compile_projection(selector):
+    """
+    Parses a field selector and returns its :class:`Projection`. Names are
+    separated by commas, nested names are written as ``author.name`` or
+    ``author(name,email)``:
+
+    .. code-block:: python
+
+        compile_projection('id,title,author(name,email),tags.label')
+
+    Raises a ``ValueError`` when the selector is not valid or nested more
+    than 8 levels deep. The projections of the last 256 distinct selectors
+    are kept.
+    """
+    projection = _projections.get(selector)
+    if projection is not None:
+        _projections.move_to_end(selector)
+        return projection
+
+    tokens = []
+    pos = 0
+    text = selector.rstrip()
+    while pos < len(text):
+        match = _tokens.match(text, pos)
+        if match is None:
+            raise ValueError('Invalid field selection')
+        tokens.append(match.group(1))
+        pos = match.end()
+
+    if not tokens:
+        raise ValueError('Empty field selection')
+
+    tree, pos = _parse(tokens, 0, _max_depth)
+    if pos != len(tokens):
+        raise ValueError('Unexpected "{}"'.format(tokens[pos]))
+
+    projection = _projections[selector] = Projection(tree)
+    if len(_projections) > _max_projections:
+        _projections.popitem(last=False)
+
+    return projection
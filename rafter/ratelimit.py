@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Token bucket backends used by :func:`rafter.filters.filter_rate_limit`.
+
+.. autoclass:: BaseBuckets
+
+    .. automethod:: consume
+
+.. autoclass:: MemoryBuckets
+
+.. autoclass:: SharedMemoryBuckets
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+import time
+
+__all__ = ('BaseBuckets', 'MemoryBuckets', 'SharedMemoryBuckets')
+
+
+def _take(tokens, last, now, rate, burst):
+    # Refills a bucket and takes a token. Returns the new token count and
+    # the time to wait for a token (0 when one was taken).
+    tokens = min(burst, tokens + (now - last) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class BaseBuckets(object):
+    """
+    Base class of token bucket backends. Keys are strings. A missing
+    bucket is full.
+    """
+
+    def consume(self, key, rate, burst):
+        """
+        Takes a token from the bucket of ``key``, refilled with ``rate``
+        tokens per second and holding at most ``burst`` tokens. Returns 0
+        when a token was taken, or else the number of seconds until the
+        next token.
+        """
+        raise NotImplementedError()
+
+
+class MemoryBuckets(BaseBuckets):
+    """
+    In-process buckets. Each check costs a dict lookup. Buckets that have
+    been refilled since their last use are dropped, the least recently used
+    first, and there are never more than ``max_keys`` of them.
+
+    :param max_keys: Maximum number of buckets
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def consume(self, key, rate, burst):
+        now = time.monotonic()
+        buckets = self._buckets
+
+        bucket = buckets.pop(key, None)
+        if bucket is None:
+            tokens, last = burst, now
+        else:
+            tokens, last, _ = bucket
+
+        tokens, wait = _take(tokens, last, now, rate, burst)
+        buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+        # The oldest buckets are full again when their refill time is over.
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if len(buckets) <= self.max_keys and oldest[2] > now:
+                break
+            buckets.popitem(last=False)
+
+        return wait
+
+
+class SharedMemoryBuckets(BaseBuckets):
+    """
+    Buckets shared by all the workers of a host, held in a fixed table of
+    shared memory. Create it before the server starts (at module level,
+    like the app), so the forked workers inherit it.
+
+    Keys are hashed to one of ``slots`` slots: the memory never grows and
+    a key replacing another in a slot starts with a full bucket. Each check
+    takes a lock shared by the workers for a few operations.
+
+    :param slots: Size of the table
+    """
+
+    def __init__(self, slots=65536):
+        self.slots = slots
+        self._keys = RawArray('Q', slots)
+        self._values = RawArray('d', slots * 2)
+        self._lock = multiprocessing.Lock()
+
+    def consume(self, key, rate, burst):
+        digest = blake2b(key.encode('utf-8'), digest_size=8).digest()
+        fingerprint = int.from_bytes(digest, 'little') | 1
+        slot = fingerprint % self.slots
+        keys, values = self._keys, self._values
+
+        with self._lock:
+            now = time.monotonic()
+            if keys[slot] == fingerprint:
+                tokens, last = values[slot * 2], values[slot * 2 + 1]
+            else:
+                keys[slot] = fingerprint
+                tokens, last = burst, now
+
+            tokens, wait = _take(tokens, last, now, rate, burst)
+            values[slot * 2] = tokens
+            values[slot * 2 + 1] = now
+
+        return wait
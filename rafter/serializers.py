@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Serializers
+-----------
+
+.. autoclass:: Serializer
+
+    .. autoattribute:: media_types
+    .. autoattribute:: content_type
+    .. automethod:: dumps
+
+.. autoclass:: JSONSerializer
+
+.. autoclass:: OrjsonSerializer
+
+.. autoclass:: MsgpackSerializer
+
+.. autoclass:: CBORSerializer
+
+
+Registry
+--------
+
+.. autoclass:: SerializerRegistry
+
+    .. autoattribute:: default
+    .. automethod:: add
+    .. automethod:: get
+    .. automethod:: negotiate
+
+"""
+
+from sanic.response import json_dumps
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+__all__ = ('Serializer', 'JSONSerializer', 'OrjsonSerializer',
+           'MsgpackSerializer', 'CBORSerializer', 'SerializerRegistry')
+
+
+class Serializer(object):
+    """
+    Base class of response serializers. A serializer turns the data held by
+    a :class:`rafter.http.Response` into bytes.
+    """
+
+    media_types = ()
+    """
+    A tuple of the media types this serializer produces. The first one
+    is used as the response's content type.
+    """
+
+    @property
+    def content_type(self):
+        """
+        The response content type (first item of :attr:`media_types`).
+        """
+        return self.media_types[0]
+
+    def dumps(self, data) -> bytes:
+        """
+        Serializes ``data`` and returns bytes.
+        """
+        raise NotImplementedError()
+
+
+class JSONSerializer(Serializer):
+    """
+    The default JSON serializer. It uses the same (ujson based) encoder as
+    Sanic.
+    """
+
+    media_types = ('application/json',)
+
+    def dumps(self, data):
+        return json_dumps(data).encode()
+
+
+class OrjsonSerializer(Serializer):
+    """
+    A JSON serializer using `orjson <https://github.com/ijl/orjson>`_.
+    Its output is the same as :class:`JSONSerializer` for regular data
+    but it is faster on large payloads.
+
+    :param option: orjson option flags
+    """
+
+    media_types = ('application/json',)
+
+    def __init__(self, option=None):
+        if orjson is None:
+            raise RuntimeError('orjson is not installed')
+
+        if option is None:
+            option = orjson.OPT_NON_STR_KEYS
+        self.option = option
+
+    def dumps(self, data):
+        return orjson.dumps(data, option=self.option)
+
+
+class MsgpackSerializer(Serializer):
+    """
+    A `MessagePack <https://msgpack.org/>`_ serializer, using the
+    ``msgpack`` package.
+    """
+
+    media_types = ('application/msgpack', 'application/x-msgpack')
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError('msgpack is not installed')
+
+    def dumps(self, data):
+        return msgpack.packb(data, use_bin_type=True)
+
+
+class CBORSerializer(Serializer):
+    """
+    A `CBOR <https://cbor.io/>`_ serializer, using the ``cbor2`` package.
+    """
+
+    media_types = ('application/cbor',)
+
+    def __init__(self):
+        if cbor2 is None:
+            raise RuntimeError('cbor2 is not installed')
+
+    def dumps(self, data):
+        return cbor2.dumps(data)
+
+
+class SerializerRegistry(object):
+    """
+    An ordered collection of serializers. The first added serializer is the
+    default one.
+
+    :param serializers: An iterable of :class:`Serializer` instances
+    """
+
+    cache_size = 256
+
+    def __init__(self, serializers=()):
+        self._serializers = []
+        self._media_types = {}
+        self._cache = {}
+
+        for s in serializers:
+            self.add(s)
+
+    def __iter__(self):
+        return iter(self._serializers)
+
+    def __len__(self):
+        return len(self._serializers)
+
+    @property
+    def default(self):
+        """
+        The default serializer, ``None`` if the registry is empty.
+        """
+        return self._serializers[0] if self._serializers else None
+
+    def add(self, serializer):
+        """
+        Adds a serializer to the registry. When two serializers share a media
+        type, the first one wins.
+        """
+        self._serializers.append(serializer)
+        for t in serializer.media_types:
+            self._media_types.setdefault(t, serializer)
+        self._cache.clear()
+
+    def get(self, media_type):
+        """
+        Returns the serializer for a given media type or ``None``.
+        """
+        return self._media_types.get(media_type)
+
+    def negotiate(self, accept):
+        """
+        Returns the best serializer for the value of an ``Accept`` header.
+        The default serializer is returned when nothing matches.
+
+        Results are cached by header value, as clients send a handful of
+        distinct values.
+        """
+        if not accept:
+            return self.default
+
+        try:
+            return self._cache[accept]
+        except KeyError:
+            pass
+
+        result = self._negotiate(accept) or self.default
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[accept] = result
+
+        return result
+
+    def _negotiate(self, accept):
+        ranges = []
+        for i, item in enumerate(accept.split(',')):
+            parts = item.split(';')
+            media_type = parts[0].strip().lower()
+            q = 1.0
+            for p in parts[1:]:
+                k, _, v = p.partition('=')
+                if k.strip() == 'q':
+                    try:
+                        q = float(v)
+                    except ValueError:
+                        q = 0.0
+
+            if media_type and q > 0:
+                ranges.append((-q, i, media_type))
+
+        for _, _, media_type in sorted(ranges):
+            if media_type == '*/*':
+                return self.default
+
+            if media_type.endswith('/*'):
+                prefix = media_type[:-1]
+                for s in self._serializers:
+                    if any(t.startswith(prefix) for t in s.media_types):
+                        return s
+                continue
+
+            serializer = self._media_types.get(media_type)
+            if serializer is not None:
+                return serializer
+
+        return None
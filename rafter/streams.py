@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+.. autoclass:: JSONStreamParser
+
+    .. automethod:: feed
+    .. automethod:: close
+"""
+
+import codecs
+import json
+
+__all__ = ('JSONStreamParser',)
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+_delimiters = _whitespace + ',]'
+_number_start = '-0123456789'
+
+# JSON array parser states
+_START, _FIRST, _ITEM, _NEXT, _END = range(5)
+
+
+class JSONStreamParser(object):
+    """
+    An incremental parser of a JSON array or of newline delimited JSON
+    (NDJSON). Data are fed by chunks of bytes and complete items are
+    returned as they arrive, so only the current item is held in memory.
+    An incomplete array item is parsed again once its text has doubled:
+    a large item can be returned a few chunks after its end.
+
+    Example:
+
+    .. code-block:: python
+
+        parser = JSONStreamParser()
+        parser.feed(b'[{"a": 1}, {"a"')  # [{'a': 1}]
+        parser.feed(b': 2}]')            # [{'a': 2}]
+        parser.close()                   # []
+
+    :param format: ``json`` (the input is a JSON array) or ``ndjson``
+                   (one JSON document per line).
+    :param max_item_size: The maximum size of a single item (in
+                          characters, default: 1 MiB). A ``ValueError`` is
+                          raised when an item is bigger.
+    """
+
+    def __init__(self, format='json', max_item_size=1048576):
+        if format not in ('json', 'ndjson'):
+            raise ValueError('Unknown stream format: {}'.format(format))
+
+        self.ndjson = format == 'ndjson'
+        self.max_item_size = max_item_size
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        # The text of an incomplete item is kept in chunks and only parsed
+        # again once it has doubled: a large item fed in many small chunks
+        # is decoded a few times, not once per chunk.
+        self._chunks = []
+        self._size = 0
+        self._retry_size = 0
+        self._state = _START
+
+    def feed(self, data):
+        """
+        Feeds a chunk of bytes to the parser and returns a list of the
+        complete items found so far.
+        """
+        items = self._feed(self._text.decode(data), False)
+
+        if self.max_item_size and self._size > self.max_item_size:
+            raise ValueError('JSON item is too large')
+
+        return items
+
+    def close(self):
+        """
+        Ends the parsing and returns the last items. A ``ValueError`` is
+        raised when the input is incomplete.
+        """
+        items = self._feed(self._text.decode(b'', final=True), True)
+        if not self.ndjson and self._state != _END:
+            raise ValueError('Incomplete JSON array')
+        return items
+
+    def _feed(self, text, final):
+        self._chunks.append(text)
+        self._size += len(text)
+
+        if not final:
+            # NDJSON lines end with the new text, array items are parsed
+            # again once the pending text has doubled
+            if self.ndjson:
+                pending = '\n' not in text
+            else:
+                pending = self._size < self._retry_size
+            if pending:
+                return []
+
+        buf = ''.join(self._chunks)
+        if self.ndjson:
+            items, rest = self._parse_lines(buf, final)
+        else:
+            items, rest = self._parse_array(buf, final)
+
+        self._chunks = [rest] if rest else []
+        self._size = len(rest)
+        self._retry_size = 2 * self._size
+        if self.max_item_size:
+            self._retry_size = min(self._retry_size, self.max_item_size)
+        return items
+
+    def _parse_lines(self, buf, final):
+        lines = buf.split('\n')
+        rest = '' if final else lines.pop()
+
+        try:
+            return [json.loads(line) for line in lines if line.strip()], rest
+        except ValueError as e:
+            raise ValueError('Invalid JSON line: {}'.format(e))
+
+    def _parse_array(self, buf, final):
+        items = []
+        size = len(buf)
+        pos = 0
+        state = self._state
+
+        while True:
+            while pos < size and buf[pos] in _whitespace:
+                pos += 1
+            if pos >= size:
+                break
+
+            c = buf[pos]
+            if state == _START:
+                if c != '[':
+                    raise ValueError('Expected a JSON array')
+                state = _FIRST
+                pos += 1
+            elif state == _FIRST and c == ']':
+                state = _END
+                pos += 1
+            elif state in (_FIRST, _ITEM):
+                try:
+                    item, end = _decoder.raw_decode(buf, pos)
+                except ValueError as e:
+                    if final:
+                        raise ValueError('Invalid JSON item: {}'.format(e))
+                    break
+
+                # A number could go on in the next chunk
+                if not final and (end >= size or (
+                        c in _number_start and buf[end] not in _delimiters)):
+                    break
+
+                items.append(item)
+                state = _NEXT
+                pos = end
+            elif state == _NEXT and c in ',]':
+                state = _ITEM if c == ',' else _END
+                pos += 1
+            else:
+                raise ValueError('Invalid JSON array')
+
+        self._state = state
+        return items, buf[pos:]
@@ -29,6 +29,18 @@ requirements = (
 )
 
 extras_require = {
+    'orjson': (
+        'orjson',
+    ),
+    'msgpack': (
+        'msgpack',
+    ),
+    'cbor': (
+        'cbor2',
+    ),
+    'brotli': (
+        'brotli',
+    ),
     'setup': (
         'pytest-runner',
     ),
@@ -60,6 +72,7 @@ setup(
     setup_requires=extras_require['setup'],
     tests_require=extras_require['test'],
     packages=packages,
+    python_requires='>=3.6',
     zip_safe=True,
     classifiers=[
         'Development Status :: 5 - Production/Stable',
@@ -71,7 +84,8 @@ setup(
         'Operating System :: POSIX',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3 :: Only',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
         'Topic :: Internet :: WWW/HTTP :: HTTP Servers'
     ],
 )
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from sanic.request import RequestParameters
+from schematics import Model, types
+from schematics.exceptions import DataError, ValidationError
+
+from rafter.contrib.schematics import (
+    ValidationErrors, model_node, compile_request_schema,
+    compile_response_schema)
+
+
+class ReqModel(Model):
+    @model_node()
+    class params(Model):
+        p1 = types.IntType(required=True)
+        p2 = types.ListType(types.IntType, serialized_name='p-2')
+
+    @model_node()
+    class body(Model):
+        name = types.StringType(default='abc')
+
+
+def test_compile():
+    compiled = compile_request_schema(ReqModel)
+    assert compiled is compile_request_schema(ReqModel)
+
+    assert compiled.schema is ReqModel
+    assert compiled.params_fields == (('p1', False), ('p-2', True))
+    assert compiled.body_fields == (('name', False),)
+    assert compiled.use_model is False
+
+
+def test_compile_no_node():
+    class Schema(Model):
+        pass
+
+    compiled = compile_request_schema(Schema)
+    assert compiled.params_fields is None
+    assert compiled.body_fields is None
+
+
+def test_extract_params():
+    compiled = compile_request_schema(ReqModel)
+    data = RequestParameters({'p1': ['1'], 'p-2': ['2'], 'x': ['3', '4']})
+
+    assert compiled.extract_params(compiled.params_fields, data) == \
+        {'p1': '1', 'p-2': ['2']}
+    assert data == {'p1': ['1'], 'p-2': ['2'], 'x': ['3', '4']}
+
+
+def test_extract_params_deserialize_from():
+    class Schema(Model):
+        @model_node()
+        class params(Model):
+            p1 = types.IntType(deserialize_from=['p', 'param'])
+
+    compiled = compile_request_schema(Schema)
+    assert compiled.params_fields == (('p1', False), ('p', False),
+                                      ('param', False))
+
+    data = RequestParameters({'param': ['1']})
+    assert compiled.extract_params(compiled.params_fields, data) == \
+        {'param': '1'}
+    assert compiled.validate({'params': {'param': '1'}}) == \
+        {'params': {'p1': 1}}
+
+
+def test_validate():
+    compiled = compile_request_schema(ReqModel)
+
+    assert compiled.validate({'params': {'p1': '1', 'p-2': ['2']}}) == {
+        'params': {'p1': 1, 'p-2': [2]},
+        'body': {'name': 'abc'}
+    }
+
+    with pytest.raises(ValidationErrors) as e:
+        compiled.validate({'params': {'p-2': ['a']}, 'body': {'name': 1}})
+
+    assert e.value.error_list == [
+        {'messages': ["Value 'a' is not int."],
+         'location': ['params', 'p-2', 0]},
+        {'messages': ['This field is required.'],
+         'location': ['params', 'p1']},
+    ]
+
+
+def test_validate_model_validators():
+    class Schema(Model):
+        value = types.IntType()
+
+        def validate_value(self, data, value):
+            if value == 1:
+                raise ValidationError('not 1')
+            return value
+
+    compiled = compile_request_schema(Schema)
+    assert compiled.use_model is True
+
+    assert compiled.validate({'value': '2'}) == {'value': 2}
+
+    with pytest.raises(ValidationErrors) as e:
+        compiled.validate({'value': '1'})
+
+    assert e.value.error_list == [
+        {'messages': ['not 1'], 'location': ['value']}
+    ]
+
+
+def test_validate_nested_model_validators():
+    class Item(Model):
+        value = types.IntType()
+
+        def validate_value(self, data, value):
+            if value == 1:
+                raise ValidationError('not 1')
+            return value
+
+    class Schema(Model):
+        @model_node()
+        class body(Model):
+            items = types.ListType(types.ModelType(Item))
+
+    compiled = compile_request_schema(Schema)
+    assert compiled.use_model is True
+
+    assert compiled.validate({'body': {'items': [{'value': '2'}]}}) == \
+        {'body': {'items': [{'value': 2}]}}
+
+    with pytest.raises(ValidationErrors):
+        compiled.validate({'body': {'items': [{'value': '1'}]}})
+
+    with pytest.raises(DataError):
+        compile_response_schema(Schema).serialize(
+            {'items': [{'value': 1}]}, {})
+
+
+def test_validate_cyclic_model_validators():
+    class Leaf(Model):
+        value = types.IntType()
+
+        def validate_value(self, data, value):
+            if value == 1:
+                raise ValidationError('not 1')
+            return value
+
+    class Parent(Model):
+        pass
+
+    class Child(Model):
+        parent = types.ModelType(Parent)
+
+    # Child -> Parent -> (Child, Leaf)
+    Parent._append_field('child', types.ModelType(Child))
+    Parent._append_field('leaf', types.ModelType(Leaf))
+
+    class ParentSchema(Model):
+        @model_node()
+        class body(Model):
+            parent = types.ModelType(Parent)
+
+    class ChildSchema(Model):
+        @model_node()
+        class body(Model):
+            child = types.ModelType(Child)
+
+    assert compile_request_schema(ParentSchema).use_model is True
+
+    compiled = compile_request_schema(ChildSchema)
+    assert compiled.use_model is True
+
+    with pytest.raises(ValidationErrors):
+        compiled.validate(
+            {'body': {'child': {'parent': {'leaf': {'value': 1}}}}})
+
+
+class RspModel(Model):
+    @model_node()
+    class body(Model):
+        name = types.StringType(required=True)
+        count = types.IntType(default=0)
+
+    @model_node()
+    class headers(Model):
+        x_count = types.IntType(serialized_name='x-count', default=1)
+
+
+def test_compile_response():
+    compiled = compile_response_schema(RspModel)
+    assert compiled is compile_response_schema(RspModel)
+    assert compiled.schema is RspModel
+    assert compiled.use_model is False
+
+
+def test_serialize():
+    compiled = compile_response_schema(RspModel)
+
+    body, headers = compiled.serialize({'name': 'abc', 'extra': 1}, {})
+    assert body == {'name': 'abc', 'count': 0}
+    assert headers == {'x-count': 1}
+
+    body, headers = compiled.serialize({'name': 'abc', 'count': '2'},
+                                       {'x-count': '5', 'x-other': 'a'})
+    assert body == {'name': 'abc', 'count': 2}
+    assert headers == {'x-count': 5}
+
+    with pytest.raises(DataError) as e:
+        compiled.serialize({'count': 'a'}, {})
+
+    assert e.value.to_primitive() == {
+        'body': {'name': ['This field is required.'],
+                 'count': ["Value 'a' is not int."]}
+    }
+
+
+def test_serialize_no_headers():
+    class Schema(Model):
+        body = types.ListType(types.IntType)
+
+    compiled = compile_response_schema(Schema)
+    assert compiled.serialize(['1', 2], {'x-test': '1'}) == ([1, 2], {})
+
+
+def test_serialize_item():
+    class Item(Model):
+        id = types.IntType(required=True)
+
+    class Schema(Model):
+        body = types.ListType(types.ModelType(Item))
+
+        @model_node()
+        class headers(Model):
+            x_count = types.IntType(serialized_name='x-count', default=1)
+
+    compiled = compile_response_schema(Schema)
+    assert compiled.serialize_item({'id': '1', 'x': 2}) == {'id': 1}
+    assert compiled.serialize_headers({}) == {'x-count': 1}
+
+    with pytest.raises(DataError) as e:
+        compiled.serialize_item({})
+    assert e.value.to_primitive() == {
+        'item': {'id': ['This field is required.']}
+    }
+
+    compiled = compile_response_schema(RspModel)
+    assert compiled.item_schema is None
+
+    with pytest.raises(TypeError):
+        compiled.serialize_item({})
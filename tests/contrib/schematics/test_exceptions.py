@@ -36,3 +36,23 @@ def test_validationerror():
 
     assert e.to_primitive() == {'xtra': 'message',
                                 'error_list': error_list}
+
+
+def test_validationerror_order():
+    e = ValidationErrors({
+        'params': {'b': ['invalid b']},
+        'body': {
+            'z': ['invalid z'],
+            'items': {1: {'id': ['invalid id']}, 0: ['invalid item']},
+            'a': ['invalid a']
+        }
+    })
+
+    assert [x['location'] for x in e.error_list] == [
+        ['body', 'a'],
+        ['body', 'items', 0],
+        ['body', 'items', 1, 'id'],
+        ['body', 'z'],
+        ['params', 'b']
+    ]
+    assert e.error_list is e.error_list
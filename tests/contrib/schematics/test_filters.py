@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
 import pytest
 
-from sanic.exceptions import ServerError
+from sanic.exceptions import InvalidUsage, ServerError
 from sanic.response import HTTPResponse
 from sanic.server import CIDict
 from schematics import Model, types
 
 from rafter.app import Rafter
-from rafter.contrib.schematics import ValidationErrors
-from rafter.http import Response
+from rafter.filters import filter_projection
+from rafter.contrib.schematics import RafterSchematics, ValidationErrors
+from rafter.http import Response, StreamingResponse
 from rafter.contrib.schematics import (
     model_node, filter_validate_schemas, filter_validate_response)
 
@@ -17,6 +22,10 @@ async def view(request, *args, **kwargs):
     return request.validated
 
 
+class ItemModel(Model):
+    id = types.IntType(required=True)
+
+
 def fake_request(url='/', method='GET', route='/', headers=None, body=None):
     headers = headers or {}
     headers_ = CIDict(host='127.0.0.1')
@@ -35,6 +44,8 @@ def fake_request(url='/', method='GET', route='/', headers=None, body=None):
 
 async def test_no_request_schema():
     get_response = filter_validate_schemas(view, {})
+    assert get_response is view
+
     rsp = await get_response(fake_request())
     assert rsp == {}
 
@@ -44,13 +55,19 @@ async def test_no_response_schema():
         return Response(request.validated)
 
     get_response = filter_validate_response(view_rsp, {})
+    assert get_response is view_rsp
+
     rsp = await get_response(fake_request())
     assert isinstance(rsp, Response)
     assert rsp.data == {}
 
 
 async def test_invalid_response():
-    get_response = filter_validate_response(view, {})
+    class RspSchema(Model):
+        body = types.DictType(types.IntType)
+
+    get_response = filter_validate_response(view,
+                                            {'response_schema': RspSchema})
     with pytest.raises(TypeError) as e:
         await get_response(fake_request())
 
@@ -170,7 +187,11 @@ async def test_response_direct():
     async def view_(request):
         return HTTPResponse('text')
 
-    get_response = filter_validate_response(view_, {})
+    class RspSchema(Model):
+        body = types.StringType()
+
+    get_response = filter_validate_response(view_,
+                                            {'response_schema': RspSchema})
 
     rsp = await get_response(fake_request())
     assert isinstance(rsp, HTTPResponse)
@@ -218,3 +239,279 @@ async def test_response_schema():
     e = e.value
     assert e.status_code == 500
     assert e.args == ('Wrong data output',)
+
+
+async def test_path():
+    class ReqModel(Model):
+        @model_node()
+        class path(Model):
+            id = types.IntType(required=True)
+
+    get_response = filter_validate_schemas(view, {'request_schema': ReqModel})
+
+    request = fake_request('/items/12', route='/items/<id>')
+    request.app.router.get = None  # The route must not be resolved again
+
+    rsp = await get_response(request, id='12')
+    assert rsp == {'path': {'id': 12}}
+
+    with pytest.raises(ValidationErrors) as e:
+        await get_response(request, id='abc')
+
+    assert e.value.error_list == [
+        {'messages': ["Value 'abc' is not int."],
+         'location': ['path', 'id']}
+    ]
+
+
+async def test_body_json_untouched():
+    class ReqModel(Model):
+        @model_node()
+        class body(Model):
+            p1 = types.IntType()
+
+            @model_node()
+            class p2(Model):
+                x = types.ListType(types.IntType)
+
+    get_response = filter_validate_schemas(view, {'request_schema': ReqModel})
+
+    request = fake_request(method='POST',
+                           body=b'{"p1": "2", "p2": {"x": ["1"]}, "p3": 1}')
+    rsp = await get_response(request)
+    assert rsp == {'body': {'p1': 2, 'p2': {'x': [1]}}}
+    assert request.json == {'p1': '2', 'p2': {'x': ['1']}, 'p3': 1}
+
+
+async def test_response_schema_stream():
+    class RspSchema(Model):
+        body = types.ListType(types.ModelType(ItemModel))
+
+        @model_node()
+        class headers(Model):
+            x_count = types.IntType(serialized_name='x-count', default=0)
+
+    async def view_stream(request):
+        return StreamingResponse([{'id': '1', 'x': 1}, {'id': 2}],
+                                 headers={'x-count': '2'})
+
+    async def view_error(request):
+        return StreamingResponse([{'id': '1'}, {'id': 'a'}])
+
+    async def view_headers_error(request):
+        return StreamingResponse([], headers={'x-count': 'a'})
+
+    params = {'response_schema': RspSchema}
+
+    get_response = filter_validate_response(view_stream, params)
+    rsp = await get_response(fake_request())
+    assert isinstance(rsp, StreamingResponse)
+    assert rsp.headers == {'x-count': 2}
+    assert [t(x) for x in rsp.data for t in rsp.transforms] == \
+        [{'id': 1}, {'id': 2}]
+
+    get_response = filter_validate_response(view_error, params)
+    rsp = await get_response(fake_request())
+    transform = rsp.transforms[0]
+    assert transform({'id': '1'}) == {'id': 1}
+
+    with pytest.raises(ServerError) as e:
+        transform({'id': 'a'})
+    assert e.value.args == ('Wrong data output',)
+
+    get_response = filter_validate_response(view_headers_error, params)
+    with pytest.raises(ServerError) as e:
+        await get_response(fake_request())
+    assert e.value.args == ('Wrong data output',)
+
+
+async def test_response_schema_projection():
+    class AuthorModel(Model):
+        id = types.IntType(required=True)
+        name = types.StringType(required=True)
+
+    class RspSchema(Model):
+        @model_node()
+        class body(Model):
+            id = types.IntType(required=True)
+            title = types.StringType(required=True)
+            author = types.ModelType(AuthorModel, required=True)
+
+        @model_node()
+        class headers(Model):
+            x_count = types.IntType(serialized_name='x-count', default=0)
+
+    async def view_data(request):
+        return Response({'id': '1', 'title': 'a',
+                         'author': {'id': '2', 'name': 'b'}})
+
+    params = {'response_schema': RspSchema, 'fields': True}
+    get_response = filter_validate_response(
+        filter_projection(view_data, params), params)
+
+    rsp = await get_response(fake_request(url='/?fields=id,author.id'))
+    assert rsp.data == {'id': 1, 'author': {'id': 2}}
+    assert rsp.headers == {'x-count': 0}
+
+    # The whole data are validated
+    async def view_error(request):
+        return Response({'id': 'a', 'title': 'a'})
+
+    get_response = filter_validate_response(
+        filter_projection(view_error, params), params)
+    with pytest.raises(ServerError):
+        await get_response(fake_request(url='/?fields=id'))
+
+    # Selected names are output names
+    class RenamedSchema(Model):
+        @model_node()
+        class body(Model):
+            id = types.IntType()
+
+            @model_node(serialized_name='options')
+            class params(Model):
+                xray = types.BooleanType(default=False)
+
+    async def view_renamed(request):
+        return Response({'id': 1, 'params': {'xray': True}})
+
+    params = {'response_schema': RenamedSchema, 'fields': True}
+    get_response = filter_validate_response(
+        filter_projection(view_renamed, params), params)
+
+    rsp = await get_response(fake_request(url='/?fields=options'))
+    assert rsp.data == {'options': {'xray': True}}
+    rsp = await get_response(fake_request(url='/?fields=params'))
+    assert rsp.data == {}
+
+    class StreamSchema(Model):
+        body = types.ListType(types.ModelType(AuthorModel))
+
+    async def view_stream(request):
+        return StreamingResponse([{'id': '1', 'name': 'a'}])
+
+    params = {'response_schema': StreamSchema, 'fields': True}
+    get_response = filter_validate_response(
+        filter_projection(view_stream, params), params)
+    rsp = await get_response(fake_request(url='/?fields=id'))
+    item = {'id': '1', 'name': 'a'}
+    for transform in rsp.transforms:
+        item = transform(item)
+    assert item == {'id': 1}
+
+
+async def test_response_schema_stream_no_list():
+    class RspSchema(Model):
+        body = types.ModelType(ItemModel)
+
+    async def view_stream(request):
+        return StreamingResponse([])
+
+    get_response = filter_validate_response(view_stream,
+                                            {'response_schema': RspSchema})
+    with pytest.raises(TypeError):
+        await get_response(fake_request())
+
+
+async def test_stream_body():
+    class ReqModel(Model):
+        body = types.ListType(types.ModelType(ItemModel))
+
+        @model_node()
+        class params(Model):
+            p1 = types.IntType(default=1)
+
+    async def view_stream(request):
+        items = [x async for x in request.validated['body']]
+        return {'params': request.validated['params'], 'items': items}
+
+    get_response = filter_validate_schemas(
+        view_stream, {'request_schema': ReqModel, 'stream': True})
+
+    request = fake_request('/?p1=3', method='POST')
+    request.stream = asyncio.Queue()
+    for chunk in (b'[{"id": "1"}, {"i', b'd": 2, "x": 1}]', None):
+        request.stream.put_nowait(chunk)
+
+    rsp = await get_response(request)
+    assert rsp == {'params': {'p1': 3}, 'items': [{'id': 1}, {'id': 2}]}
+
+    request = fake_request(method='POST', body=b'[{"id": 1}, {}]')
+    with pytest.raises(ValidationErrors) as e:
+        await get_response(request)
+
+    assert e.value.error_list == [
+        {'messages': ['This field is required.'],
+         'location': ['body', 1, 'id']}
+    ]
+
+
+async def test_stream_body_model():
+    class ReqModel(Model):
+        @model_node()
+        class body(Model):
+            id = types.IntType(required=True)
+
+    async def view_stream(request):
+        return [x async for x in request.validated['body']]
+
+    get_response = filter_validate_schemas(
+        view_stream, {'request_schema': ReqModel, 'stream': True})
+
+    request = fake_request(method='POST', body=b'{"id": "1"}\n{"id": 2}',
+                           headers={'content-type': 'application/x-ndjson'})
+    assert await get_response(request) == [{'id': 1}, {'id': 2}]
+
+    class NoBodyModel(Model):
+        @model_node()
+        class params(Model):
+            p1 = types.IntType(required=True)
+
+    get_response = filter_validate_schemas(
+        view_stream, {'request_schema': NoBodyModel, 'stream': True})
+
+    request = fake_request('/?p1=1', method='POST', body=b'[1, "a"]')
+    assert await get_response(request) == [1, 'a']
+
+    with pytest.raises(ValidationErrors):
+        await get_response(fake_request(method='POST', body=b'[]'))
+
+
+async def test_validate_in_executor():
+    app = RafterSchematics(executor=ThreadPoolExecutor(1), offload_size=16)
+    threads = []
+
+    class Schema(Model):
+        @model_node()
+        class body(Model):
+            name = types.StringType(required=True)
+
+            def validate_name(self, data, value):
+                threads.append(threading.current_thread())
+                return value
+
+    async def view(request):
+        return request.validated
+
+    get_response = filter_validate_schemas(view, {'request_schema': Schema})
+
+    def request(body):
+        req = app.request_class(b'/', {'content-type': 'application/json'},
+                                '1.1', 'POST', None)
+        req.app = app
+        req.body = body
+        return req
+
+    res = await get_response(request(b'{"name": "a"}'))
+    assert res['body'] == {'name': 'a'}
+    assert threads.pop() is threading.current_thread()
+
+    res = await get_response(request(b'{"name": "abcdefghij"}'))
+    assert res['body'] == {'name': 'abcdefghij'}
+    assert threads.pop() is not threading.current_thread()
+
+    with pytest.raises(ValidationErrors):
+        await get_response(request(b'{"other": "abcdefghij"}'))
+
+    with pytest.raises(InvalidUsage):
+        await get_response(request(b'{"name": "abcdefghij"'))
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
+import pytest
 from schematics import Model, types
 
-from rafter.contrib.schematics import model_node
+from rafter.contrib.schematics import (
+    PageParams, ValidationErrors, compile_request_schema, model_node)
+from rafter.pagination import Paginator
 
 
 def test_model_node_decorator():
@@ -38,3 +41,23 @@ def test_model_node_decorator():
         },
         'p': 2
     }
+
+
+def test_page_params():
+    class ReqSchema(Model):
+        @model_node()
+        class params(PageParams):
+            limit = types.IntType(min_value=1, max_value=5, default=3)
+            q = types.StringType()
+
+    compiled = compile_request_schema(ReqSchema)
+    assert compiled.validate({'params': {}})['params'] == {
+        'limit': 3, 'cursor': None, 'q': None}
+
+    with pytest.raises(ValidationErrors):
+        compiled.validate({'params': {'limit': '10'}})
+
+    class Request(object):
+        validated = compiled.validate({'params': {'limit': '2'}})
+
+    assert Paginator('secret').get_window(Request()) == (None, 2)
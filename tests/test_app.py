@@ -41,6 +41,15 @@ def test_app_resource():
 
     route = app.router._get('/strm', 'GET', '')
     assert route[0].is_stream is True
+    assert app.is_request_stream is True
+
+    def strm2(request):
+        pass
+
+    app = Rafter()
+    app.add_resource(strm2, '/strm2', stream=True)
+    assert strm2.is_stream is True
+    assert app.is_request_stream is True
 
 
 def test_app_filters():
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from sanic.response import HTTPResponse, text
+from sanic.server import CIDict
+
+from rafter import ApiError, Rafter
+from rafter.batch import BatchHandler
+
+
+def fake_request(app, body):
+    headers = CIDict({'accept-encoding': 'gzip', 'x-token': 'def'})
+    request = app.request_class(b'/batch', headers, '1.1', 'POST', None)
+    request.app = app
+    request.body = json.dumps(body).encode()
+
+    return request
+
+
+@pytest.fixture
+def app():
+    app = Rafter()
+
+    @app.resource('/items/<id:int>')
+    async def item(request, id):
+        return {'id': id, 'q': request.args.getlist('q'),
+                'token': request.headers.get('x-token'),
+                'encoding': request.headers.get('accept-encoding')}
+
+    @app.resource('/items', methods=['POST'])
+    async def create(request):
+        return {'created': request.json}
+
+    @app.resource('/error')
+    async def error(request):
+        raise ApiError('Conflict', 409, key='k')
+
+    @app.resource('/text')
+    async def plain(request):
+        return text('hello')
+
+    @app.resource('/invalid')
+    async def invalid(request):
+        return HTTPResponse(body_bytes=b'\x1f\x8b\xff',
+                            content_type='application/json')
+
+    return app
+
+
+async def test_batch(app):
+    handler = BatchHandler(app)
+    request = fake_request(app, [
+        {'path': '/items/1', 'params': {'q': ['a', 'b']},
+         'headers': {'X-Token': 'abc'}},
+        {'path': '/items?q=c', 'method': 'post', 'body': {'name': 'x'}},
+        {'path': '/error'},
+        {'path': '/text'},
+        {'path': '/missing'},
+        {'method': 'GET'}
+    ])
+
+    res = await handler(request)
+    assert [r['status'] for r in res.data] == [200, 200, 409, 200, 404, 400]
+    assert res.data[0]['body'] == {
+        'id': 1, 'q': ['a', 'b'], 'token': 'abc', 'encoding': None}
+    assert res.data[1]['body'] == {'created': {'name': 'x'}}
+    assert res.data[2]['body'] == {
+        'status': 409, 'message': 'Conflict', 'key': 'k'}
+    assert res.data[3]['body'] == 'hello'
+    assert res.data[5]['body']['message'] == 'Invalid batch item'
+
+
+async def test_batch_item_errors(app):
+    handler = BatchHandler(app)
+    request = fake_request(app, [
+        {'path': '/items/1', 'headers': {'Accept-Encoding': 'gzip'}},
+        {'path': '/invalid'}
+    ])
+
+    res = await handler(request)
+    assert [r['status'] for r in res.data] == [200, 500]
+    assert res.data[0]['body']['encoding'] is None
+
+
+async def test_batch_invalid(app):
+    handler = BatchHandler(app, max_items=1)
+
+    with pytest.raises(ApiError):
+        await handler(fake_request(app, {'path': '/items/1'}))
+
+    with pytest.raises(ApiError):
+        await handler(fake_request(app, [{'path': '/items/1'}] * 2))
+
+
+async def test_batch_nested(app):
+    app.add_batch_resource('/batch')
+    app.add_batch_resource('/multi', version=1, strict_slashes=False)
+    handler = BatchHandler(app)
+
+    res = await handler(fake_request(app, [
+        {'path': '/batch', 'method': 'POST', 'body': []},
+        {'path': '/v1/multi', 'method': 'POST', 'body': []},
+        {'path': '/v1/multi/', 'method': 'POST', 'body': []}
+    ]))
+    assert [r['status'] for r in res.data] == [400, 400, 400]
+    assert res.data[1]['body']['message'] == 'Batch items cannot be batches'
+
+    # Sub-requests of a batch can't run another one
+    request = fake_request(app, [])
+    request.batch_parent = fake_request(app, [])
+    with pytest.raises(ApiError):
+        await handler(request)
+
+
+def test_add_batch_resource(app):
+    app.add_batch_resource('/multi', max_items=10)
+
+    request = app.request_class(b'/multi', {}, '1.1', 'POST', None)
+    handler, _, _, uri = app.router.get(request)
+    assert uri == '/multi'
+    assert handler.__wrapped__.max_items == 10
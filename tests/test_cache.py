@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from rafter.cache import CacheEntry, FileCache, MemoryCache
+
+
+def entry(body=b'{}'):
+    return CacheEntry(200, {'x-a': 'b'}, 'application/json', body)
+
+
+def test_memory_cache():
+    cache = MemoryCache()
+    assert cache.get('a') is None
+
+    cache.set('a', entry(), 10)
+    assert cache.get('a') == entry()
+    assert len(cache) == 1
+
+    cache.delete('a')
+    assert cache.get('a') is None
+    assert cache.size == 0
+
+
+def test_memory_cache_ttl(monkeypatch):
+    cache = MemoryCache()
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now)
+    cache.set('a', entry(), 10)
+    assert cache.get('a') is not None
+
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 10)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_memory_cache_lru():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', entry(), 10)
+    cache.set('b', entry(), 10)
+    cache.get('a')
+    cache.set('c', entry(), 10)
+
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+
+
+def test_memory_cache_size():
+    cache = MemoryCache(max_size=10)
+    cache.set('a', entry(b'12345'), 10)
+    cache.set('b', entry(b'12345'), 10)
+    assert len(cache) == 2
+
+    cache.set('c', entry(b'1'), 10)
+    assert cache.get('a') is None
+    assert cache.size == 6
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_file_cache(tmpdir):
+    cache = FileCache(str(tmpdir))
+    assert cache.get('a') is None
+
+    cache.set('a', entry(b'\n{}\n'), 10)
+    assert cache.get('a') == entry(b'\n{}\n')
+
+    # Shared by another instance
+    assert FileCache(str(tmpdir)).get('a') == entry(b'\n{}\n')
+
+    cache.set('b', entry(), -1)
+    assert cache.get('b') is None
+
+    cache.delete('a')
+    assert cache.get('a') is None
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_file_cache_prune(tmpdir):
+    cache = FileCache(str(tmpdir), max_entries=2, prune_interval=3)
+    for i, k in enumerate('abc'):
+        cache.set(k, entry(), 10)
+        os.utime(cache._path(k), (i, i))
+
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    assert cache.get('c') is not None
+
+    cache.clear()
+    assert os.listdir(str(tmpdir)) == []
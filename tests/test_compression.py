@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import gzip
+import zlib
+
+import pytest
+
+from rafter.compression import (
+    available_encodings, compress, negotiate_encoding)
+
+
+def test_available_encodings():
+    assert available_encodings()[-2:] == ('gzip', 'deflate')
+
+
+def test_compress():
+    data = b'{"a":1}' * 100
+
+    assert gzip.decompress(compress('gzip', data)) == data
+    assert zlib.decompress(compress('deflate', data, 1)) == data
+
+    # Same input, same output
+    assert compress('gzip', data) == compress('gzip', data)
+
+    with pytest.raises(RuntimeError):
+        compress('zip', data)
+
+
+def test_negotiate_encoding():
+    encodings = ('br', 'gzip', 'deflate')
+
+    assert negotiate_encoding('', encodings) is None
+    assert negotiate_encoding('identity', encodings) is None
+    assert negotiate_encoding('gzip, deflate', encodings) == 'gzip'
+    assert negotiate_encoding('deflate, gzip, br', encodings) == 'br'
+    assert negotiate_encoding('gzip;q=0.5, deflate', encodings) == 'deflate'
+    assert negotiate_encoding('*', encodings) == 'br'
+    assert negotiate_encoding('*, br;q=0', encodings) == 'gzip'
+    assert negotiate_encoding('gzip;q=x', encodings) is None
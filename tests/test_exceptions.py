@@ -2,7 +2,7 @@
 import json
 import logging
 
-from sanic.exceptions import abort, SanicException
+from sanic.exceptions import abort, NotFound, SanicException
 from sanic.response import HTTPResponse
 from sanic.server import CIDict
 
@@ -10,6 +10,7 @@ from rafter.app import Rafter
 from rafter.exceptions import (
     ApiError,
     ExceptionHandler, SanicExceptionHandler, ApiErrorHandler)
+from rafter.http import Response
 
 
 def view(request):
@@ -37,6 +38,11 @@ def test_apierror():
     assert e.status_code == 400
     assert e.data == {'xtra': 1}
     assert e.to_primitive() == e.data
+    assert e.headers == {}
+
+    e = ApiError('error', 503, headers={'Retry-After': '1'})
+    assert e.headers == {'Retry-After': '1'}
+    assert e.data == {}
 
 
 def test_exception_handler(caplog):
@@ -86,6 +92,50 @@ def test_api_error_handler():
         'xtra': 'abc'
     }
 
+    e = ApiError('busy', 503, headers={'Retry-After': '2'})
+    res = ApiErrorHandler()(fake_request(), e)
+    assert res.status == 503
+    assert res.headers['Retry-After'] == '2'
+
+
+def test_static_error_bodies():
+    handler = ExceptionHandler(static_bodies=True)
+    res1 = handler(fake_request(), ValueError('a'))
+    res2 = handler(fake_request(), KeyError('b'))
+    assert type(res1) is HTTPResponse
+    assert res1.content_type == 'application/json'
+    assert res2.body is res1.body
+    assert json.loads(res1.body.decode('utf-8')) == {
+        'status': 500,
+        'message': 'An error occured.'
+    }
+
+    # Router errors hold the URL: they are not kept
+    handler = SanicExceptionHandler()
+    for i in range(300):
+        res = handler(fake_request(),
+                      NotFound('Requested URL /{} not found'.format(i)))
+        assert res.status == 404
+        assert json.loads(res.body.decode('utf-8'))['message'] == \
+            'Requested URL /{} not found'.format(i)
+    assert handler._static_bodies == {}
+
+    # Handlers are not static unless told so
+    class MessageHandler(ExceptionHandler):
+        def get_data(self, request, exception):
+            return {'status': 500, 'message': str(exception)}
+
+    handler = MessageHandler()
+    res1 = handler(fake_request(), ValueError('first'))
+    res2 = handler(fake_request(), ValueError('second'))
+    assert res1.data['message'] == 'first'
+    assert res2.data['message'] == 'second'
+
+    # Errors with data are serialized when sent
+    res = ApiErrorHandler()(fake_request(), ApiError('error', 400, xtra=1))
+    assert isinstance(res, Response)
+    assert res.data == {'status': 400, 'message': 'error', 'xtra': 1}
+
 
 def test_default_error_handlers():
     app = Rafter()
@@ -1,15 +1,30 @@
 # -*- coding: utf-8 -*-
-from sanic.response import HTTPResponse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import gzip
+import threading
 
+import pytest
+
+from sanic.response import HTTPResponse, stream
+
+from rafter import filters
 from rafter.app import Rafter
-from rafter.http import Response
-from rafter.filters import filter_transform_response
+from rafter.cache import FileCache, MemoryCache
+from rafter.exceptions import ApiError
+from rafter.http import Response, StreamingResponse
+from rafter.filters import (
+    Filter, build_pipeline, filter_cache, filter_compress, filter_concurrency,
+    filter_etag, filter_projection, filter_rate_limit, filter_serialize,
+    filter_single_flight, filter_transform_response)
+from rafter.serializers import Serializer
 
 
-def fake_request():
+def fake_request(headers=None, url=b'/', method='GET'):
     app = Rafter()
 
-    request = app.request_class(b'/', {}, '1.1', 'GET', None)
+    request = app.request_class(url, headers or {}, '1.1', method, None)
     request.app = app
     request.body = b''
 
@@ -44,3 +59,751 @@ async def test_sanic_response():
     res = await get_response(fake_request())
     assert not isinstance(res, Response)
     assert res.body == b'abc'
+
+
+async def test_streaming_response():
+    async def view_stream(request):
+        return StreamingResponse([1, 2])
+
+    async def view_sanic_stream(request):
+        async def fn(response):
+            pass
+
+        return stream(fn)
+
+    async def view_generator(request):
+        return (x for x in range(2))
+
+    async def view_async_generator(request):
+        async def items():
+            yield 1
+
+        return items()
+
+    get_response = filter_transform_response(view_stream, {})
+    res = await get_response(fake_request())
+    assert isinstance(res, StreamingResponse)
+    assert res.data == [1, 2]
+
+    get_response = filter_transform_response(view_sanic_stream, {})
+    res = await get_response(fake_request())
+    assert not isinstance(res, StreamingResponse)
+    assert not isinstance(res, Response)
+
+    for view in (view_generator, view_async_generator):
+        get_response = filter_transform_response(view, {})
+        res = await get_response(fake_request())
+        assert isinstance(res, StreamingResponse)
+        assert res.format == 'json'
+
+
+async def test_negotiated_response():
+    class TextSerializer(Serializer):
+        media_types = ('text/plain',)
+
+        def dumps(self, data):
+            return str(data).encode('utf-8')
+
+    async def view_base(request):
+        return {'a': 1}
+
+    async def view_explicit(request):
+        return Response({'a': 1}, content_type='application/json')
+
+    get_response = filter_transform_response(view_base, {})
+    request = fake_request({'accept': 'text/plain'})
+    request.app.serializers.add(TextSerializer())
+
+    res = await get_response(request)
+    assert res.content_type == 'text/plain'
+    assert res.body == b"{'a': 1}"
+    assert res.headers['Vary'] == 'Accept'
+
+    res = await get_response(fake_request({'accept': 'text/plain'}))
+    assert res.content_type == 'application/json'
+    assert res.body == b'{"a":1}'
+    assert 'Vary' not in res.headers
+
+    get_response = filter_transform_response(view_explicit, {})
+    request = fake_request({'accept': 'text/plain'})
+    request.app.serializers.add(TextSerializer())
+
+    res = await get_response(request)
+    assert res.content_type == 'application/json'
+    assert res.body == b'{"a":1}'
+    assert 'Vary' not in res.headers
+
+
+async def test_pipeline():
+    calls = []
+
+    class F1(Filter):
+        def before(self, request, *args, **kwargs):
+            calls.append(('f1.before', args, kwargs))
+
+        async def after(self, request, response):
+            calls.append('f1.after')
+            response.data['f1'] = True
+            return response
+
+    class F2(Filter):
+        async def before(self, request, *args, **kwargs):
+            calls.append('f2.before')
+            if request.args.get('stop'):
+                return Response({'stopped': True})
+
+    class F3(Filter):
+        def after(self, request, response):
+            calls.append('f3.after')
+            response.headers['x-f3'] = self.params['name']
+            return response
+
+    async def view(request, *args, **kwargs):
+        calls.append('view')
+        return Response({})
+
+    params = {'name': 'test'}
+    get_response = build_pipeline(view, [F1(params), F2(params), F3(params)])
+
+    res = await get_response(fake_request(), 1, a=2)
+    assert res.data == {'f1': True}
+    assert res.headers == {'x-f3': 'test'}
+    assert calls == ['f2.before', ('f1.before', (1,), {'a': 2}),
+                     'view', 'f1.after', 'f3.after']
+
+    del calls[:]
+    request = fake_request()
+    request.parsed_args = {'stop': ['1']}
+    res = await get_response(request)
+    assert res.data == {'stopped': True}
+    assert res.headers == {'x-f3': 'test'}
+    assert calls == ['f2.before', 'f3.after']
+
+
+async def test_init_filters():
+    class F1(Filter):
+        def after(self, request, response):
+            response.data.append('f1')
+            return response
+
+    class F2(Filter):
+        def after(self, request, response):
+            response.data.append('f2')
+            return response
+
+    def f3(get_response, params):
+        async def decorated_filter(request, *args, **kwargs):
+            response = await get_response(request, *args, **kwargs)
+            response.data.append('f3')
+            return response
+
+        return decorated_filter
+
+    def f_noop(get_response, params):
+        return get_response
+
+    async def view(request):
+        return []
+    view.is_stream = True
+
+    handler = Rafter.init_filters(
+        [filter_transform_response, F1, F2, f3, F1], {})(view)
+
+    assert handler.__name__ == 'view'
+    assert handler.is_stream is True
+    assert handler.__wrapped__ is view
+
+    res = await handler(fake_request())
+    assert res.data == ['f1', 'f2', 'f3', 'f1']
+
+    assert Rafter.init_filters([], {})(view) is view
+    assert Rafter.init_filters([f_noop], {})(view) is view
+
+
+async def test_inactive_filters():
+    class F1(Filter):
+        def __init__(self, params):
+            super(F1, self).__init__(params)
+            self.active = params.get('f1', False)
+
+        def after(self, request, response):
+            return Response('f1')
+
+    class F2(Filter):
+        pass
+
+    async def view(request):
+        return Response('view')
+
+    assert build_pipeline(view, [F1({}), F2({})]) is view
+    assert Rafter.init_filters([F1, F2], {})(view) is view
+
+    handler = Rafter.init_filters([F1, F2], {'f1': True})(view)
+    assert handler is not view
+
+    res = await handler(fake_request())
+    assert res.data == 'f1'
+
+
+async def test_cache_filter_disabled():
+    async def view(request):
+        return {}
+
+    assert filter_cache(view, {}) is view
+    assert filter_cache(view, {'cache': None}) is view
+
+
+async def test_cache_filter():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        return Response({'a': len(calls)}, headers={'x-a': 'b'})
+
+    get_response = filter_cache(filter_transform_response(view, {}),
+                                {'cache': True})
+
+    res = await get_response(fake_request())
+    assert isinstance(res, Response)
+    assert res.body == b'{"a":1}'
+
+    res = await get_response(fake_request())
+    assert type(res) is HTTPResponse
+    assert res.body == b'{"a":1}'
+    assert res.headers == {'x-a': 'b'}
+    assert res.content_type == 'application/json'
+    assert len(calls) == 1
+
+    # Vary on the accept header
+    await get_response(fake_request({'accept': 'text/plain'}))
+    assert len(calls) == 2
+
+    # Other methods are not cached
+    await get_response(fake_request(method='POST'))
+    await get_response(fake_request(method='POST'))
+    assert len(calls) == 4
+
+
+async def test_cache_filter_query():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        return Response({})
+
+    get_response = filter_cache(view, {'cache': {'query': ['a']}})
+
+    await get_response(fake_request(url=b'/?a=1&b=1'))
+    await get_response(fake_request(url=b'/?b=2&a=1'))
+    assert len(calls) == 1
+
+    await get_response(fake_request(url=b'/?a=2'))
+    assert len(calls) == 2
+
+    get_response = filter_cache(view, {'cache': True})
+    await get_response(fake_request(url=b'/?a=1&b=1'))
+    await get_response(fake_request(url=b'/?b=1&a=1'))
+    assert len(calls) == 3
+    await get_response(fake_request(url=b'/?a=1&b=2'))
+    assert len(calls) == 4
+
+
+async def test_cache_filter_not_cacheable():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        if request.args.get('s'):
+            return Response({}, status=int(request.args.get('s')))
+        return Response({}, headers={'Cache-Control': 'no-store'})
+
+    get_response = filter_cache(view, {'cache': {'ttl': 10}})
+
+    for url in (b'/', b'/', b'/?s=201', b'/?s=201'):
+        await get_response(fake_request(url=url))
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize('backend', ['memory', 'file'])
+async def test_cache_filter_cookies(backend, tmpdir):
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        response = Response({})
+        response.cookies['session'] = 'secret-{}'.format(len(calls))
+        return response
+
+    backend = MemoryCache() if backend == 'memory' else FileCache(str(tmpdir))
+    get_response = filter_cache(view, {'cache': {'backend': backend}})
+
+    for i in range(2):
+        res = await get_response(fake_request())
+        assert res.cookies['session'].value == 'secret-{}'.format(i + 1)
+    assert len(calls) == 2
+
+
+async def test_cache_filter_backend_error():
+    class FailingCache(MemoryCache):
+        def set(self, key, entry, ttl):
+            raise OSError('No space left on device')
+
+    async def view(request):
+        return Response({'a': 1})
+
+    get_response = filter_cache(view, {'cache': {'backend': FailingCache()}})
+
+    res = await get_response(fake_request())
+    assert res.data == {'a': 1}
+
+
+async def test_etag_filter_disabled():
+    async def view(request):
+        return {}
+
+    assert filter_etag(view, {}) is view
+
+
+async def test_etag_filter_body():
+    async def view(request):
+        return Response({'a': 1}, headers={'Cache-Control': 'max-age=10'})
+
+    get_response = filter_etag(filter_transform_response(view, {}),
+                               {'etag': True})
+
+    res = await get_response(fake_request())
+    assert res.status == 200
+    etag = res.headers['ETag']
+    assert etag.startswith('"') and etag.endswith('"')
+
+    res = await get_response(fake_request({'If-None-Match': etag}))
+    assert res.status == 304
+    assert res.body == b''
+    assert res.headers['ETag'] == etag
+    assert res.headers['Cache-Control'] == 'max-age=10'
+
+    res = await get_response(
+        fake_request({'If-None-Match': '"x", W/{}'.format(etag)}))
+    assert res.status == 304
+
+    res = await get_response(fake_request({'If-None-Match': '"x"'}))
+    assert res.status == 200
+
+    res = await get_response(
+        fake_request({'If-None-Match': etag}, method='POST'))
+    assert res.status == 200
+    assert 'ETag' not in res.headers
+
+
+async def test_etag_filter_version():
+    calls = []
+
+    async def view(request, id):
+        calls.append(id)
+        return Response({'id': id})
+
+    async def version(request, id):
+        return 'v{}'.format(id)
+
+    get_response = filter_etag(view, {'etag': version})
+
+    res = await get_response(fake_request(), id=1)
+    assert res.headers['ETag'] == '"v1"'
+
+    res = await get_response(fake_request({'If-None-Match': '"v1"'}), id=1)
+    assert res.status == 304
+    assert res.headers['ETag'] == '"v1"'
+    assert calls == [1]
+
+    res = await get_response(fake_request({'If-None-Match': '*'}), id=2)
+    assert res.status == 304
+    assert calls == [1]
+
+
+async def test_etag_filter_last_modified():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        return Response({})
+
+    def last_modified(request):
+        return datetime(2018, 1, 2, 3, 4, 5, 600)
+
+    get_response = filter_etag(view, {'last_modified': last_modified})
+
+    res = await get_response(fake_request())
+    assert res.headers['Last-Modified'] == 'Tue, 02 Jan 2018 03:04:05 GMT'
+
+    res = await get_response(fake_request(
+        {'If-Modified-Since': 'Tue, 02 Jan 2018 03:04:05 GMT'}))
+    assert res.status == 304
+    assert res.headers['Last-Modified'] == 'Tue, 02 Jan 2018 03:04:05 GMT'
+
+    res = await get_response(fake_request(
+        {'If-Modified-Since': 'Tue, 02 Jan 2018 03:04:04 GMT'}))
+    assert res.status == 200
+
+    res = await get_response(fake_request({'If-Modified-Since': 'nope'}))
+    assert res.status == 200
+    assert len(calls) == 3
+
+
+async def test_single_flight_filter():
+    calls = []
+
+    async def view(request, id):
+        calls.append(id)
+        await asyncio.sleep(0.01)
+        return Response({'id': id})
+
+    get_response = filter_single_flight(
+        filter_transform_response(view, {}),
+        {'single_flight': True, 'uri': '/<id>'})
+
+    res = await asyncio.gather(
+        get_response(fake_request(), id=1),
+        get_response(fake_request(), id=1),
+        get_response(fake_request(), id=2),
+        get_response(fake_request(url=b'/?a=1'), id=1))
+
+    assert calls == [1, 2, 1]
+    assert isinstance(res[0], Response)
+    assert type(res[1]) is HTTPResponse
+    assert res[1].body == res[0].body == b'{"id":1}'
+    assert res[1].content_type == 'application/json'
+
+    # Nothing in flight anymore
+    await get_response(fake_request(), id=1)
+    assert calls == [1, 2, 1, 1]
+
+
+async def test_single_flight_filter_error():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('error')
+
+    get_response = filter_single_flight(view, {'single_flight': True})
+
+    res = await asyncio.gather(get_response(fake_request()),
+                               get_response(fake_request()),
+                               return_exceptions=True)
+    assert len(calls) == 1
+    assert all(isinstance(e, ValueError) for e in res)
+
+
+async def test_single_flight_filter_cancel():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return Response({'n': len(calls)})
+
+    get_response = filter_single_flight(view, {'single_flight': True})
+
+    leader = asyncio.ensure_future(get_response(fake_request()))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(get_response(fake_request()))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    res = await follower
+    assert res.data == {'n': 2}
+    assert leader.cancelled()
+
+
+async def test_single_flight_filter_serialize_error():
+    async def view(request):
+        await asyncio.sleep(0.01)
+        return Response({'a': object()})
+
+    get_response = filter_single_flight(view, {'single_flight': True})
+
+    res = await asyncio.wait_for(
+        asyncio.gather(get_response(fake_request()),
+                       get_response(fake_request()),
+                       return_exceptions=True), 1)
+    assert all(isinstance(r, TypeError) for r in res)
+
+
+async def test_single_flight_filter_stream():
+    calls = []
+
+    async def view(request):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return StreamingResponse([1])
+
+    get_response = filter_single_flight(view, {'single_flight': True})
+
+    res = await asyncio.gather(get_response(fake_request()),
+                               get_response(fake_request()))
+    assert len(calls) == 2
+    assert all(isinstance(r, StreamingResponse) for r in res)
+
+
+async def test_concurrency_filter():
+    running = []
+    calls = []
+
+    async def view(request, id):
+        running.append(id)
+        calls.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(id)
+        return Response({'id': id})
+
+    assert filter_concurrency(view, {}) is view
+
+    get_response = filter_concurrency(view, {'max_concurrency': 1,
+                                             'max_queue': 1,
+                                             'retry_after': 5})
+
+    res = await asyncio.gather(*(get_response(fake_request(), id=i)
+                                 for i in range(3)),
+                               return_exceptions=True)
+
+    assert [r.data for r in res[:2]] == [{'id': 0}, {'id': 1}]
+    assert isinstance(res[2], ApiError)
+    assert res[2].status_code == 503
+    assert res[2].headers == {'Retry-After': '5'}
+    assert calls == [1, 1]
+
+    # Slots are released
+    res = await get_response(fake_request(), id=3)
+    assert res.data == {'id': 3}
+
+
+async def test_concurrency_filter_timeout():
+    async def view(request):
+        await asyncio.sleep(0.05)
+        return Response({})
+
+    get_response = filter_concurrency(view, {'max_concurrency': 1,
+                                             'queue_timeout': 0.01})
+
+    res = await asyncio.gather(get_response(fake_request()),
+                               get_response(fake_request()),
+                               return_exceptions=True)
+    assert isinstance(res[0], Response)
+    assert isinstance(res[1], ApiError)
+
+    # A cancelled waiter doesn't hold a slot
+    get_response = filter_concurrency(view, {'max_concurrency': 1})
+    first = asyncio.ensure_future(get_response(fake_request()))
+    waiter = asyncio.ensure_future(get_response(fake_request()))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await first
+    res = await asyncio.wait_for(get_response(fake_request()), 1)
+    assert isinstance(res, Response)
+
+
+async def test_concurrency_filter_timeout_handover(monkeypatch):
+    async def view(request):
+        await asyncio.sleep(0.01)
+        return Response({})
+
+    async def late_wait_for(future, timeout):
+        # The slot is handed over before the timeout is raised
+        await asyncio.sleep(0.05)
+        assert future.done()
+        raise asyncio.TimeoutError()
+
+    get_response = filter_concurrency(view, {'max_concurrency': 1,
+                                             'queue_timeout': 0.01})
+
+    monkeypatch.setattr(filters, 'wait_for', late_wait_for)
+    res = await asyncio.gather(get_response(fake_request()),
+                               get_response(fake_request()),
+                               return_exceptions=True)
+    assert isinstance(res[0], Response)
+    assert isinstance(res[1], ApiError)
+
+    # The handed over slot was released
+    monkeypatch.undo()
+    res = await get_response(fake_request())
+    assert isinstance(res, Response)
+
+
+async def test_compress_filter():
+    data = [{'a': i} for i in range(200)]
+
+    async def view(request):
+        return data
+
+    get_response = filter_compress(filter_transform_response(view, {}),
+                                   {'compress': {'executor_size': 1024}})
+    headers = {'accept-encoding': 'gzip'}
+
+    res = await get_response(fake_request(headers))
+    assert type(res) is HTTPResponse
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert res.headers['Vary'] == 'Accept-Encoding'
+    assert res.content_type == 'application/json'
+    assert len(res.body) < 1024
+    body = res.body
+    assert gzip.decompress(body) == Response(data).body
+
+    # Same body, same compressed bytes
+    res = await get_response(fake_request(headers))
+    assert res.body is body
+
+    res = await get_response(fake_request())
+    assert isinstance(res, Response)
+    assert 'Content-Encoding' not in res.headers
+    assert res.headers['Vary'] == 'Accept-Encoding'
+
+
+async def test_compress_filter_skipped():
+    async def view(request):
+        return Response([1] * int(request.args.get('n')),
+                        headers={'Vary': 'Accept'})
+
+    assert filter_compress(view, {}) is view
+
+    get_response = filter_compress(view, {'compress': {'min_size': 100}})
+    headers = {'accept-encoding': 'gzip'}
+
+    res = await get_response(fake_request(headers, url=b'/?n=10'))
+    assert isinstance(res, Response)
+    assert res.headers == {'Vary': 'Accept'}
+
+    res = await get_response(fake_request(headers, url=b'/?n=100'))
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert res.headers['Vary'] == 'Accept, Accept-Encoding'
+
+
+async def test_projection_filter():
+    async def view(request):
+        return Response({'id': 1, 'title': 'a', 'author': {'id': 2, 'n': 3}})
+
+    async def view_stream(request):
+        return StreamingResponse([{'id': 1, 'title': 'a'}])
+
+    assert filter_projection(view, {}) is view
+
+    get_response = filter_projection(view, {'fields': True})
+    res = await get_response(fake_request())
+    assert res.data == {'id': 1, 'title': 'a', 'author': {'id': 2, 'n': 3}}
+
+    request = fake_request(url=b'/?fields=id,author.n')
+    res = await get_response(request)
+    assert res.data == {'id': 1, 'author': {'n': 3}}
+    assert request.projection.tree == {'id': None, 'author': {'n': None}}
+
+    get_response = filter_projection(view_stream, {'fields': {'param': 'f'}})
+    res = await get_response(fake_request(url=b'/?f=title'))
+    assert [t(x) for x in res.data for t in res.transforms] == \
+        [{'title': 'a'}]
+
+    for url in (b'/?f=a(', b'/?f=' + b'a' * 1025):
+        with pytest.raises(ApiError) as e:
+            await get_response(fake_request(url=url))
+        assert e.value.status_code == 400
+
+
+async def test_serialize_filter():
+    threads = []
+
+    class ThreadSerializer(Serializer):
+        media_types = ('application/json',)
+
+        def dumps(self, data):
+            if isinstance(data, list):
+                threads.append(threading.current_thread())
+                return b'x' * len(data)
+            return b'x'
+
+    async def view(request):
+        size = int(request.args.get('size'))
+        if request.args.get('hint'):
+            return Response({'size': size}, size_hint=size,
+                            serializer=ThreadSerializer())
+        return Response(['a'] * size, serializer=ThreadSerializer())
+
+    # No executor, no filter
+    assert filter_serialize(view, {'app': Rafter()}) is view
+
+    app = Rafter(executor=ThreadPoolExecutor(1), offload_size=100)
+    get_response = filter_serialize(view, {'app': app})
+
+    res = await get_response(fake_request(url=b'/?size=10'))
+    assert not res.is_serialized
+    assert res.body == b'x' * 10
+    assert threads.pop() is threading.current_thread()
+
+    # The size of the list is estimated from its first item
+    res = await get_response(fake_request(url=b'/?size=100'))
+    assert res.is_serialized
+    assert threads.pop() is not threading.current_thread()
+
+    res = await get_response(fake_request(url=b'/?size=10'))
+    assert not res.is_serialized
+
+    # Other data give a size hint
+    res = await get_response(fake_request(url=b'/?size=100&hint=1'))
+    assert res.is_serialized
+    res = await get_response(fake_request(url=b'/?size=10&hint=1'))
+    assert not res.is_serialized
+
+
+async def test_rate_limit_filter():
+    async def view(request):
+        return Response({})
+
+    assert filter_rate_limit(view, {}) is view
+
+    get_response = filter_rate_limit(view, {'uri': '/', 'rate_limit': {
+        'limit': 2, 'period': 60, 'key': 'header:x-key'}})
+
+    for _ in range(2):
+        res = await get_response(fake_request({'x-key': 'a'}))
+        assert isinstance(res, Response)
+
+    with pytest.raises(ApiError) as e:
+        await get_response(fake_request({'x-key': 'a'}))
+    assert e.value.status_code == 429
+    assert e.value.headers == {'Retry-After': '30'}
+
+    # Other clients and requests without a key
+    await get_response(fake_request({'x-key': 'b'}))
+    for _ in range(3):
+        await get_response(fake_request())
+
+
+async def test_rate_limit_filter_forwarded():
+    async def view(request):
+        return Response({})
+
+    def request(forwarded):
+        return fake_request({'X-Forwarded-For': forwarded})
+
+    get_response = filter_rate_limit(view, {'uri': '/', 'rate_limit': {
+        'limit': 1, 'period': 60, 'key': 'forwarded'}})
+
+    # Addresses set by the client don't make it another client
+    await get_response(request('1.1.1.1, 10.0.0.1'))
+    with pytest.raises(ApiError):
+        await get_response(request('2.2.2.2, 10.0.0.1'))
+    await get_response(request('10.0.0.2'))
+
+    get_response = filter_rate_limit(view, {'uri': '/', 'rate_limit': {
+        'limit': 1, 'period': 60, 'key': 'forwarded:2'}})
+
+    await get_response(request('1.1.1.1, 10.0.0.1, 10.0.1.1'))
+    with pytest.raises(ApiError):
+        await get_response(request('2.2.2.2, 10.0.0.1, 10.0.1.2'))
+    await get_response(request('10.0.0.2, 10.0.1.1'))
+
+
+def test_rate_limit_filter_key():
+    async def view(request):
+        return Response({})
+
+    with pytest.raises(RuntimeError):
+        filter_rate_limit(view, {'rate_limit': {'limit': 1, 'key': 'nope'}})
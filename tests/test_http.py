@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import json
+
+import pytest
 
 from sanic.response import HTTPResponse
+from sanic.server import CIDict
 
-from rafter.http import Request, Response
+from rafter.exceptions import ApiError
+from rafter.http import Request, Response, StreamingResponse
 
 
 def test_request():
@@ -27,3 +33,178 @@ def test_response():
     assert rsp.content_type == 'application/json'
     assert rsp.body == b'{"test":2}'
     assert rsp.data == {'test': 2}
+
+
+def test_response_body_cache():
+    rsp = Response({'test': 1})
+    assert not rsp.is_serialized
+
+    body = rsp.body
+    assert rsp.is_serialized
+    assert rsp.body is body
+    assert rsp.content_length == len(body) == 10
+
+    rsp.body = {'test': 22}
+    assert not rsp.is_serialized
+    assert rsp.data == {'test': 22}
+    assert rsp.body == b'{"test":22}'
+    assert rsp.content_length == 11
+
+    rsp.data = [1, 2]
+    assert not rsp.is_serialized
+    assert rsp.body == b'[1,2]'
+
+
+def test_response_expected_size():
+    item = {'id': 1, 'name': 'abc'}
+    item_size = len(Response(item).body)
+
+    assert Response([item] * 100).expected_size == item_size * 100
+    assert Response({'items': [item] * 100, 'next': '/x'}).expected_size \
+        == item_size * 100
+    assert Response({'a': 1}).expected_size == 0
+    assert Response({'a': 1}, size_hint=500).expected_size == 500
+
+    rsp = Response([item] * 100, size_hint=10)
+    assert rsp.expected_size == 10
+    assert rsp.body
+    assert rsp.expected_size == len(rsp.body)
+
+
+def test_response_output():
+    rsp = Response({'test': 1})
+    output = rsp.output()
+
+    assert rsp.headers['Content-Length'] == 10
+    assert output.endswith(b'\r\n\r\n{"test":1}')
+
+
+class FakeTransport(object):
+    def __init__(self, buffer_sizes=()):
+        self.data = []
+        self.buffer_sizes = list(buffer_sizes)
+        self.closing = False
+
+    def write(self, data):
+        self.data.append(data)
+
+    def get_write_buffer_size(self):
+        return self.buffer_sizes.pop(0) if self.buffer_sizes else 0
+
+    def is_closing(self):
+        return self.closing
+
+    def body(self):
+        # Removes chunk sizes and the last chunk
+        data = b''.join(self.data)
+        chunks = data.split(b'\r\n\r\n', 1)[1].split(b'\r\n')
+        return b''.join(chunks[1:-3:2])
+
+
+async def stream_body(rsp, transport=None):
+    rsp.transport = transport or FakeTransport()
+    await rsp.stream()
+    return rsp.transport.body()
+
+
+async def test_streaming_response():
+    rsp = StreamingResponse([{'a': 1}, {'a': 2}])
+    assert rsp.status == 200
+    assert rsp.content_type == 'application/json'
+    assert await stream_body(rsp) == b'[{"a":1},{"a":2}]'
+
+    rsp = StreamingResponse([])
+    assert await stream_body(rsp) == b'[]'
+
+    async def items():
+        for i in range(3):
+            yield {'i': i}
+
+    rsp = StreamingResponse(items(), format='ndjson')
+    assert rsp.content_type == 'application/x-ndjson'
+    assert await stream_body(rsp) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
+
+    rsp = StreamingResponse([], format='ndjson')
+    assert await stream_body(rsp) == b''
+
+    with pytest.raises(ValueError):
+        StreamingResponse([], format='xml')
+
+
+async def test_streaming_response_chunks():
+    rsp = StreamingResponse(range(1000))
+    rsp.chunk_size = 100
+    transport = FakeTransport()
+
+    body = await stream_body(rsp, transport)
+    assert json.loads(body.decode('utf-8')) == list(range(1000))
+    assert len(transport.data) > 10
+
+
+async def test_streaming_response_transforms():
+    rsp = StreamingResponse([1, 2, 3])
+    rsp.add_transform(lambda x: x * 2)
+    rsp.add_transform(str)
+
+    assert await stream_body(rsp) == b'["2","4","6"]'
+
+
+async def test_streaming_response_backpressure():
+    rsp = StreamingResponse(range(10))
+    rsp.chunk_size = 1
+    rsp.high_water = 10
+    rsp.drain_delay = 0
+    transport = FakeTransport([20, 20, 5])
+
+    body = await stream_body(rsp, transport)
+    assert json.loads(body.decode('utf-8')) == list(range(10))
+    assert transport.buffer_sizes == []
+
+    # Closed connection: the stream stops
+    rsp = StreamingResponse(range(10))
+    rsp.chunk_size = 1
+    transport = FakeTransport()
+    transport.closing = True
+    rsp.transport = transport
+
+    await rsp.stream()
+    assert len(transport.data) == 3
+
+
+def json_request(body, content_type='application/json', stream=None):
+    request = Request(b'/', CIDict({'content-type': content_type}), '1.1',
+                      'POST', None)
+    request.body = body
+    if stream is not None:
+        request.stream = asyncio.Queue()
+        for chunk in stream:
+            request.stream.put_nowait(chunk)
+        request.stream.put_nowait(None)
+
+    return request
+
+
+async def collect(aiter):
+    return [x async for x in aiter]
+
+
+async def test_request_iter_json():
+    request = json_request(b'[1, {"a": 2}]')
+    assert await collect(request.iter_json()) == [1, {'a': 2}]
+
+    request = json_request(b'1\n{"a": 2}\n',
+                           'application/x-ndjson; charset=utf-8')
+    assert await collect(request.iter_json()) == [1, {'a': 2}]
+
+    request = json_request(b'1\n2\n')
+    assert await collect(request.iter_json('ndjson')) == [1, 2]
+
+    request = json_request(b'', stream=[b'[1, ', b'2', b']'])
+    assert await collect(request.iter_json()) == [1, 2]
+
+    request = json_request(b'', stream=[b'[1, ', b'2'])
+    with pytest.raises(ApiError) as e:
+        await collect(request.iter_json())
+
+    assert e.value.status_code == 400
+    assert str(e.value) == 'Invalid JSON body: Incomplete JSON array'
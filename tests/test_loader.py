@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from rafter.app import Rafter
+from rafter.loader import DataLoader
+
+
+def make_batch_fn(calls):
+    async def batch_fn(keys):
+        calls.append(keys)
+        await asyncio.sleep(0)
+        return [ValueError(k) if k < 0 else k * 10 for k in keys]
+
+    return batch_fn
+
+
+async def test_loader():
+    calls = []
+    loader = DataLoader(make_batch_fn(calls))
+
+    res = await asyncio.gather(loader.load(1), loader.load(2),
+                               loader.load(1), loader.load_many([3, 2]))
+    assert res == [10, 20, 10, [30, 20]]
+    assert calls == [[1, 2, 3]]
+
+    # Memoized values
+    assert await loader.load(2) == 20
+    assert await loader.load_many([4, 1]) == [40, 10]
+    assert calls == [[1, 2, 3], [4]]
+
+    loader.clear(4)
+    loader.prime(5, 'five')
+    assert await loader.load_many([4, 5]) == [40, 'five']
+    assert calls == [[1, 2, 3], [4], [4]]
+
+    with pytest.raises(ValueError):
+        await loader.load(-1)
+
+
+async def test_loader_batch_size():
+    calls = []
+    loader = DataLoader(make_batch_fn(calls), max_batch_size=2)
+    assert await loader.load_many([1, 2, 3]) == [10, 20, 30]
+    assert calls == [[1, 2], [3]]
+
+
+async def test_loader_error():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise RuntimeError('down')
+        return keys
+
+    loader = DataLoader(batch_fn)
+    res = await asyncio.gather(loader.load(1), loader.load(2),
+                               return_exceptions=True)
+    assert all(isinstance(e, RuntimeError) for e in res)
+
+    # Failed keys are loaded again
+    assert await loader.load(1) == 1
+
+    async def wrong(keys):
+        return []
+
+    with pytest.raises(ValueError):
+        await DataLoader(wrong).load(1)
+
+
+async def test_loader_cancel():
+    calls = []
+    loader = DataLoader(make_batch_fn(calls))
+
+    first = loader.load(1)
+    second = loader.load(1)
+    first.cancel()
+    assert await second == 10
+
+
+async def test_request_loader():
+    app = Rafter()
+    request = app.request_class(b'/', {}, '1.1', 'GET', None)
+    calls = []
+    batch_fn = make_batch_fn(calls)
+
+    loader = request.loader(batch_fn, max_batch_size=10)
+    assert request.loader(batch_fn) is loader
+    assert loader.max_batch_size == 10
+
+    other = app.request_class(b'/', {}, '1.1', 'GET', None)
+    assert other.loader(batch_fn) is not loader
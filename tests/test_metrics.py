@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from rafter import ApiError, Rafter
+from rafter.metrics import Histogram, Metrics
+
+
+def fake_request(app, url=b'/'):
+    request = app.request_class(url, {}, '1.1', 'GET', None)
+    request.app = app
+    request.body = b''
+
+    return request
+
+
+def test_histogram():
+    h = Histogram((1, 5))
+    for v in (0, 1, 2, 5, 6):
+        h.observe(v)
+
+    assert h.counts == [2, 2, 1]
+    assert h.sum == 14
+    assert h.count == 5
+
+
+def test_disabled():
+    app = Rafter()
+    assert app.metrics is None
+
+    async def view(request):
+        return {}
+
+    app.add_resource(view, '/', filters=[])
+    handler = app.router.get(fake_request(app))[0]
+    assert handler is view
+
+    with pytest.raises(RuntimeError):
+        app.add_metrics_resource()
+
+
+async def test_metrics():
+    app = Rafter(metrics=True)
+    assert isinstance(app.metrics, Metrics)
+
+    @app.resource('/items/<id>', name='item')
+    async def view(request, id):
+        if id == 'x':
+            raise ApiError('Not found', 404)
+        return {'id': id}
+
+    handler = app.router.get(fake_request(app, b'/items/1'))[0]
+    assert handler.__name__ == 'view'
+
+    await handler(fake_request(app), id='1')
+    await handler(fake_request(app), id='2')
+    with pytest.raises(ApiError):
+        await handler(fake_request(app), id='x')
+
+    data = app.metrics.snapshot()['item']
+    assert data['requests'] == 3
+    assert data['statuses'] == {'2xx': 2, '4xx': 1}
+    assert data['handler']['count'] == 2
+    assert data['filters']['count'] == 2
+    assert data['serialization']['count'] == 2
+    assert data['response_size']['sum'] == len(b'{"id":"1"}') * 2
+
+    text = app.metrics.render()
+    assert 'rafter_requests_total{route="item"} 3\n' in text
+    assert 'rafter_responses_total{route="item",status="4xx"} 1\n' in text
+    assert 'rafter_handler_seconds_count{route="item"} 2\n' in text
+    assert 'rafter_response_size_bytes_bucket{route="item",le="128"} 2\n' \
+        in text
+    assert 'rafter_response_size_bytes_bucket{route="item",le="+Inf"} 2\n' \
+        in text
+
+
+async def test_metrics_resource():
+    app = Rafter(metrics=True)
+    app.add_metrics_resource('/m')
+
+    handler = app.router.get(fake_request(app, b'/m'))[0]
+    res = await handler(fake_request(app, b'/m'))
+    assert res.content_type.startswith('text/plain; version=0.0.4')
+    assert b'# TYPE rafter_requests_total counter' in res.body
+
+
+def test_metrics_directory(tmpdir):
+    metrics = Metrics(size_buckets=(10,), directory=str(tmpdir))
+    histogram = {'counts': [1, 0], 'sum': 5, 'count': 1}
+    other_worker = {'r': {
+        'requests': 1, 'statuses': {'2xx': 1},
+        'filters': histogram, 'handler': histogram,
+        'serialization': histogram, 'response_size': histogram}}
+    tmpdir.join('1.json').write(json.dumps(other_worker))
+    tmpdir.join('2.json').write(json.dumps(other_worker))
+
+    text = metrics.render()
+    assert 'rafter_requests_total{route="r"} 2\n' in text
+    assert 'rafter_response_size_bytes_bucket{route="r",le="10"} 2\n' in text
+
+    # The current worker's snapshot is written too
+    assert len(tmpdir.listdir()) == 3
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from rafter.app import Rafter
+from rafter.exceptions import ApiError
+from rafter.http import Response
+from rafter.pagination import Paginator
+
+items = [{'id': i, 'name': 'item {}'.format(i)} for i in range(1, 26)]
+
+
+def fake_request(url='/items'):
+    app = Rafter()
+
+    request = app.request_class(url.encode('utf-8'), {}, '1.1', 'GET', None)
+    request.app = app
+
+    return request
+
+
+def make_fetch(calls):
+    async def fetch(after, limit):
+        calls.append((after, limit))
+        start = 0 if after is None else after[0]
+        return [x for x in items if x['id'] > start][:limit]
+
+    return fetch
+
+
+def next_url(response):
+    link = response.headers['Link']
+    assert link.endswith('>; rel="next"')
+    return link[1:-len('>; rel="next"')]
+
+
+async def test_paginate():
+    calls = []
+    fetch = make_fetch(calls)
+    paginator = Paginator('secret', default_limit=10)
+
+    res = await paginator.paginate(fake_request('/items?q=a'), fetch)
+    assert isinstance(res, Response)
+    assert res.data == items[:10]
+    assert calls == [(None, 11)]
+
+    url = next_url(res)
+    parts = urlsplit(url)
+    assert parts.path == '/items'
+    assert parse_qs(parts.query)['q'] == ['a']
+
+    res = await paginator.paginate(fake_request(url), fetch)
+    assert res.data == items[10:20]
+    assert calls[-1] == ((10,), 11)
+
+    res = await paginator.paginate(fake_request(next_url(res)), fetch)
+    assert res.data == items[20:]
+    assert 'Link' not in res.headers
+
+    res = await paginator.paginate(fake_request('/items?limit=25'), fetch)
+    assert res.data == items
+    assert 'Link' not in res.headers
+
+
+async def test_paginate_body():
+    paginator = Paginator('secret', key=lambda x: (x['id'],),
+                          links='body')
+    res = await paginator.paginate(fake_request('/items?limit=20'),
+                                   make_fetch([]))
+    assert res.data['items'] == items[:20]
+
+    res = await paginator.paginate(fake_request(res.data['next']),
+                                   make_fetch([]))
+    assert res.data == {'items': items[20:], 'next': None}
+
+
+async def test_paginate_validated():
+    calls = []
+    paginator = Paginator('secret')
+    request = fake_request('/items?limit=1000')
+    request.validated = {'params': {'limit': 2, 'cursor': None}}
+
+    res = await paginator.paginate(request, make_fetch(calls))
+    assert res.data == items[:2]
+
+
+@pytest.mark.parametrize('url', [
+    '/items?limit=0', '/items?limit=101', '/items?limit=a',
+    '/items?cursor=abc', '/items?cursor=a.b.c', '/items?cursor=%E9.a'])
+async def test_paginate_invalid(url):
+    with pytest.raises(ApiError) as e:
+        await Paginator('secret').paginate(fake_request(url), make_fetch([]))
+    assert e.value.status_code == 400
+
+
+def test_cursor():
+    paginator = Paginator(b'secret', key=('a', 'b'))
+    cursor = paginator.encode_cursor(('x', 2))
+    assert paginator.decode_cursor(cursor) == ('x', 2)
+
+    # Signed with another key
+    with pytest.raises(ApiError):
+        Paginator('other').decode_cursor(cursor)
+
+    payload, signature = cursor.split('.')
+    forged = Paginator('other').encode_cursor(('y', 3)).split('.')[0]
+    with pytest.raises(ApiError):
+        paginator.decode_cursor(forged + '.' + signature)
+
+    with pytest.raises(RuntimeError):
+        Paginator('secret', links='nope')
+
+
+async def test_iter_items():
+    calls = []
+    paginator = Paginator('secret')
+
+    result = [x async for x in paginator.iter_items(make_fetch(calls),
+                                                    page_size=10)]
+    assert result == items
+    assert calls == [(None, 10), ((10,), 10), ((20,), 10)]
+
+    calls = []
+    result = [x async for x in paginator.iter_items(make_fetch(calls),
+                                                    after=(20,),
+                                                    page_size=5)]
+    assert result == items[20:]
+    assert calls == [((20,), 5), ((25,), 5)]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from sanic.response import HTTPResponse
+
+from rafter.app import Rafter
+from rafter.filters import Filter
+
+
+def fake_request(url=b'/'):
+    request = Rafter().request_class(url, {}, '1.1', 'GET', None)
+    request.body = b''
+
+    return request
+
+
+def filter_stop(get_response, params):
+    async def decorated_filter(request, *args, **kwargs):
+        if request.args.get('stop'):
+            return HTTPResponse('stopped')
+        return await get_response(request, *args, **kwargs)
+
+    return decorated_filter
+
+
+class HeaderFilter(Filter):
+    def after(self, request, response):
+        response.headers['x-a'] = 'b'
+        return response
+
+
+async def view(request):
+    return HTTPResponse('ok')
+
+
+def test_no_profile():
+    assert Rafter.init_filters([], {})(view) is view
+
+
+async def test_profile_callback():
+    records = []
+
+    def callback(request, timings):
+        records.append(timings)
+
+    get_response = Rafter.init_filters(
+        [filter_stop, HeaderFilter], {'profile': callback})(view)
+    assert get_response.__name__ == 'view'
+
+    res = await get_response(fake_request())
+    assert res.body == b'ok'
+    assert res.headers == {'x-a': 'b'}
+
+    timings = records[0]
+    assert [t[0] for t in timings] == ['HeaderFilter', 'filter_stop', 'view']
+    for i, (name, total, own) in enumerate(timings):
+        assert 0 <= own <= total
+        if i > 0:
+            assert total + timings[i - 1][2] == timings[i - 1][1]
+
+    # The resource is not called
+    await get_response(fake_request(b'/?stop=1'))
+    assert [t[0] for t in records[1]] == ['HeaderFilter', 'filter_stop']
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+async def test_profile_header_and_log():
+    get_response = Rafter.init_filters(
+        [filter_stop], {'profile': {'header': True, 'log': True}})(view)
+
+    handler = ListHandler()
+    logger = logging.getLogger('rafter.profiling')
+    logger.addHandler(handler)
+    try:
+        res = await get_response(fake_request())
+    finally:
+        logger.removeHandler(handler)
+
+    parts = res.headers['Server-Timing'].split(', ')
+    assert [p.split(';')[0] for p in parts] == ['filter_stop', 'view']
+    assert all(p.split(';')[1].startswith('dur=') for p in parts)
+
+    assert len(handler.records) == 1
+    assert handler.records[0].filter_timings[1][0] == 'view'
+    assert 'filter_stop' in handler.records[0].getMessage()
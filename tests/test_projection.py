@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from rafter.projection import compile_projection
+
+
+def test_compile_projection():
+    p = compile_projection('id, title,author(name,email),tags.label')
+    assert p.tree == {
+        'id': None,
+        'title': None,
+        'author': {'name': None, 'email': None},
+        'tags': {'label': None}
+    }
+    assert compile_projection('id, title,author(name,email),tags.label') \
+        is p
+
+    # Merged paths, a whole value wins
+    assert compile_projection('a.b,a(c),a.d.e').tree == {
+        'a': {'b': None, 'c': None, 'd': {'e': None}}}
+    assert compile_projection('a.b,a').tree == {'a': None}
+
+
+@pytest.mark.parametrize('selector', [
+    '', ' ', 'a,', ',a', 'a(b', 'a)b', '(a)', 'a..b', 'a()', 'a b',
+    '.'.join('a' * 10), 'a(' * 10 + 'b' + ')' * 10])
+def test_compile_projection_invalid(selector):
+    with pytest.raises(ValueError):
+        compile_projection(selector)
+
+
+def test_apply_projection():
+    p = compile_projection('id,author(name),tags.label,missing')
+    data = {
+        'id': 1,
+        'title': 'Title',
+        'author': {'name': 'John', 'email': 'john@example.org'},
+        'tags': [{'label': 'a', 'id': 1}, {'label': 'b', 'id': 2}]
+    }
+    assert p.apply(data) == {
+        'id': 1,
+        'author': {'name': 'John'},
+        'tags': [{'label': 'a'}, {'label': 'b'}]
+    }
+    assert p.apply([data, {'id': 2}]) == [p.apply(data), {'id': 2}]
+    assert p.apply('abc') == 'abc'
+    assert 'title' in data
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import time
+
+import pytest
+
+from rafter.ratelimit import MemoryBuckets, SharedMemoryBuckets
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [time.monotonic()]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize('buckets', [MemoryBuckets, SharedMemoryBuckets])
+def test_buckets(clock, buckets):
+    buckets = buckets()
+    # 2 tokens per second, 3 at once
+    assert [buckets.consume('a', 2, 3) for _ in range(3)] == [0, 0, 0]
+    assert buckets.consume('a', 2, 3) == pytest.approx(.5)
+    assert buckets.consume('b', 2, 3) == 0
+
+    clock[0] += .5
+    assert buckets.consume('a', 2, 3) == 0
+    assert buckets.consume('a', 2, 3) == pytest.approx(.5)
+
+    clock[0] += 10
+    assert [buckets.consume('a', 2, 3) for _ in range(3)] == [0, 0, 0]
+    assert buckets.consume('a', 2, 3) > 0
+
+
+def test_memory_buckets_eviction(clock):
+    buckets = MemoryBuckets(max_keys=2)
+    buckets.consume('a', 1, 1)
+    buckets.consume('b', 1, 1)
+    buckets.consume('c', 1, 1)
+    assert len(buckets) == 2
+
+    # Full buckets are dropped
+    clock[0] += 1
+    buckets.consume('d', 1, 1)
+    assert len(buckets) == 1
+
+
+def _consume(buckets, results):
+    results.put(buckets.consume('a', 1, 2))
+
+
+def test_shared_memory_buckets():
+    buckets = SharedMemoryBuckets(slots=16)
+    results = multiprocessing.get_context('fork').Queue()
+    processes = [
+        multiprocessing.get_context('fork').Process(
+            target=_consume, args=(buckets, results))
+        for _ in range(3)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+    waits = sorted(results.get() for _ in processes)
+    assert waits[:2] == [0, 0]
+    assert waits[2] > 0
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from rafter.http import Response
+from rafter.serializers import (
+    Serializer, JSONSerializer, OrjsonSerializer, MsgpackSerializer,
+    CBORSerializer, SerializerRegistry)
+
+
+class XMLSerializer(Serializer):
+    media_types = ('application/xml', 'text/xml')
+
+    def dumps(self, data):
+        return b'<data/>'
+
+
+def test_json_serializer():
+    s = JSONSerializer()
+    assert s.content_type == 'application/json'
+    assert s.dumps({'a': [1, 2]}) == b'{"a":[1,2]}'
+
+
+def test_orjson_serializer():
+    pytest.importorskip('orjson')
+
+    s = OrjsonSerializer()
+    assert s.content_type == 'application/json'
+    assert s.dumps({'a': [1, 2]}) == b'{"a":[1,2]}'
+    assert json.loads(s.dumps({1: 'a'}).decode('utf-8')) == {'1': 'a'}
+
+
+def test_msgpack_serializer():
+    msgpack = pytest.importorskip('msgpack')
+
+    s = MsgpackSerializer()
+    assert s.content_type == 'application/msgpack'
+    assert msgpack.unpackb(s.dumps({'a': [1, 2]}), raw=False) == \
+        {'a': [1, 2]}
+
+
+def test_cbor_serializer():
+    cbor2 = pytest.importorskip('cbor2')
+
+    s = CBORSerializer()
+    assert s.content_type == 'application/cbor'
+    assert cbor2.loads(s.dumps({'a': [1, 2]})) == {'a': [1, 2]}
+
+
+def test_registry():
+    json_s = JSONSerializer()
+    xml_s = XMLSerializer()
+    registry = SerializerRegistry([json_s, xml_s])
+
+    assert len(registry) == 2
+    assert list(registry) == [json_s, xml_s]
+    assert registry.default is json_s
+    assert registry.get('text/xml') is xml_s
+    assert registry.get('text/plain') is None
+
+    assert SerializerRegistry().default is None
+
+
+def test_registry_negotiate():
+    json_s = JSONSerializer()
+    xml_s = XMLSerializer()
+    registry = SerializerRegistry([json_s, xml_s])
+
+    assert registry.negotiate(None) is json_s
+    assert registry.negotiate('') is json_s
+    assert registry.negotiate('*/*') is json_s
+    assert registry.negotiate('text/plain') is json_s
+    assert registry.negotiate('application/xml') is xml_s
+    assert registry.negotiate('text/*') is xml_s
+    assert registry.negotiate('text/html, Text/XML') is xml_s
+    assert registry.negotiate(
+        'application/json;q=0.5, application/xml') is xml_s
+    assert registry.negotiate(
+        'application/json;q=0.9, application/xml;q=0.2') is json_s
+    assert registry.negotiate('application/xml;q=0') is json_s
+    assert registry.negotiate('application/xml;q=abc') is json_s
+
+
+def test_registry_negotiate_cache():
+    registry = SerializerRegistry([JSONSerializer()])
+    registry.cache_size = 2
+
+    registry.negotiate('a/a')
+    registry.negotiate('b/b')
+    assert len(registry._cache) == 2
+
+    registry.negotiate('c/c')
+    assert len(registry._cache) == 1
+
+    registry.add(XMLSerializer())
+    assert len(registry._cache) == 0
+
+
+def test_response_serializer():
+    rsp = Response({'a': 1}, serializer=XMLSerializer())
+    assert rsp.content_type == 'application/xml'
+    assert rsp.body == b'<data/>'
+    assert not rsp.is_negotiable
+
+    rsp.serializer = JSONSerializer()
+    assert not rsp.is_serialized
+    assert rsp.content_type == 'application/json'
+    assert rsp.body == b'{"a":1}'
+
+    rsp = Response({'a': 1}, content_type='application/vnd.test+json')
+    assert rsp.content_type == 'application/vnd.test+json'
+    assert not rsp.is_negotiable
+    assert rsp.body == b'{"a":1}'
+
+    rsp = Response({'a': 1})
+    assert rsp.is_negotiable
+    assert rsp.serializer is None
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from rafter import streams
+from rafter.streams import JSONStreamParser
+
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+def test_json_array():
+    data = '[{"a": 1, "b": [1, 2]}, 12345, "x,]", true, null, -1.5e3 ]'
+    data = data.encode('utf-8')
+    expected = [{'a': 1, 'b': [1, 2]}, 12345, 'x,]', True, None, -1500.0]
+
+    assert feed_all(JSONStreamParser(), [data]) == expected
+
+    # Byte by byte
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert feed_all(JSONStreamParser(), chunks) == expected
+
+
+def test_json_array_incremental():
+    parser = JSONStreamParser()
+    assert parser.feed(b' [ {"a": 1}, {"a"') == [{'a': 1}]
+    assert parser.feed(b': 2}, 12') == [{'a': 2}]
+    assert parser.feed(b'3') == []
+    assert parser.feed(b']') == [123]
+    assert parser.close() == []
+
+
+def test_json_array_unicode():
+    data = '["été", "☃"]'.encode('utf-8')
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert feed_all(JSONStreamParser(), chunks) == ['été', '☃']
+
+
+def test_json_array_large_item(monkeypatch):
+    calls = []
+
+    class Decoder(json.JSONDecoder):
+        def raw_decode(self, s, idx=0):
+            calls.append(idx)
+            return super(Decoder, self).raw_decode(s, idx)
+
+    monkeypatch.setattr(streams, '_decoder', Decoder())
+
+    # An item fed in many chunks is not parsed again for every chunk
+    data = json.dumps([['a' * 10] * 10000, 1]).encode('utf-8')
+    chunks = [data[i:i + 100] for i in range(0, len(data), 100)]
+    assert len(chunks) > 1000
+
+    items = feed_all(JSONStreamParser(), chunks)
+    assert items == [['a' * 10] * 10000, 1]
+    assert len(calls) < 20
+
+
+def test_json_array_empty():
+    assert feed_all(JSONStreamParser(), [b'[', b' ]']) == []
+
+
+def test_json_array_errors():
+    with pytest.raises(ValueError) as e:
+        JSONStreamParser().feed(b'{"a": 1}')
+    assert str(e.value) == 'Expected a JSON array'
+
+    with pytest.raises(ValueError) as e:
+        JSONStreamParser().feed(b'[1 2]')
+    assert str(e.value) == 'Invalid JSON array'
+
+    with pytest.raises(ValueError) as e:
+        JSONStreamParser().feed(b'[1] 2')
+    assert str(e.value) == 'Invalid JSON array'
+
+    with pytest.raises(ValueError) as e:
+        feed_all(JSONStreamParser(), [b'[1, 2'])
+    assert str(e.value) == 'Incomplete JSON array'
+
+    with pytest.raises(ValueError) as e:
+        feed_all(JSONStreamParser(), [b'[1, {"a": }]'])
+    assert str(e.value).startswith('Invalid JSON item')
+
+    with pytest.raises(ValueError) as e:
+        parser = JSONStreamParser(max_item_size=10)
+        parser.feed(b'["aaaaaaaaaaaaaa')
+    assert str(e.value) == 'JSON item is too large'
+
+    with pytest.raises(ValueError):
+        JSONStreamParser('xml')
+
+
+def test_ndjson():
+    data = b'{"a": 1}\n\n{"a": 2}\r\n3\n"x"'
+    expected = [{'a': 1}, {'a': 2}, 3, 'x']
+
+    assert feed_all(JSONStreamParser('ndjson'), [data]) == expected
+
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert feed_all(JSONStreamParser('ndjson'), chunks) == expected
+
+    parser = JSONStreamParser('ndjson')
+    assert parser.feed(b'1\n2') == [1]
+    assert parser.close() == [2]
+
+    with pytest.raises(ValueError) as e:
+        JSONStreamParser('ndjson').feed(b'{"a"\n')
+    assert str(e.value).startswith('Invalid JSON line')